@@ -7,20 +7,22 @@ para el almacenamiento de archivos.
 """
 
 from fastapi import FastAPI, UploadFile, HTTPException, Form, File, Body
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse, RedirectResponse
+from fastapi.responses import FileResponse, JSONResponse, RedirectResponse, Response
 from pydantic import BaseModel, Field
 from enum import Enum
-import json
 import logging
 import os
+import uuid
+import orjson
 from typing import Optional, List, Any
 from celery import Celery
 from celery.result import AsyncResult
 from fastapi.encoders import jsonable_encoder
 
 # Imports de almacenamiento
-from src.infrastructure.storage.s3 import upload_bytes, download_bytes, presigned_get_url, key_exists
+from src.infrastructure.storage.s3 import upload_bytes, upload_fileobj, download_bytes, presigned_get_url, key_exists
 from src.infrastructure.config.settings import settings
 
 # Configuración
@@ -32,6 +34,12 @@ celery_app = Celery(
     broker=os.getenv('CELERY_BROKER_URL', 'redis://redis:6379/0'),
     backend=os.getenv('CELERY_RESULT_BACKEND', 'redis://redis:6379/0')
 )
+# Mismos serializadores que el worker
+celery_app.conf.update(
+    task_serializer='msgpack',
+    result_serializer='msgpack',
+    accept_content=['msgpack', 'json'],
+)
 
 # Modelos de datos
 
@@ -133,12 +141,13 @@ async def translate_pdf_endpoint(
     srcLang: str = Form("auto"),
     tgtLang: str = Form("es"),
     languageModel: str = Form("openai/gpt-4o-mini"),
-    confidence: float = Form(0.45)
+    confidence: float = Form(0.45),
+    imageFormat: Optional[str] = Form(None)
 ):
     """Recibe un archivo PDF y comienza una tarea de traducción asíncrona.
 
-    Valida que el archivo sea un PDF, lo lee en memoria y lo envía a una
-    tarea de Celery para su procesamiento. Devuelve inmediatamente el ID
+    Valida que el archivo sea un PDF, lo sube a S3 en streaming y lanza una
+    tarea de Celery que lo procesa a partir de su clave. Devuelve inmediatamente el ID
     de la tarea para su posterior consulta.
 
     :param file: El archivo PDF a traducir.
@@ -151,6 +160,9 @@ async def translate_pdf_endpoint(
     :type languageModel: str
     :param confidence: Nivel de confianza para el modelo.
     :type confidence: float
+    :param imageFormat: Formato de las imágenes de página intermedias ('JPEG' o 'PNG');
+                        si se omite se usa el configurado en el worker.
+    :type imageFormat: Optional[str]
     :return: Un objeto JSON con el `taskId` de la tarea iniciada.
     :rtype: UploadResponse
     :raises HTTPException: 400 si el archivo no es PDF, 500 para errores internos.
@@ -161,11 +173,16 @@ async def translate_pdf_endpoint(
         if not file.filename.lower().endswith('.pdf'):
             raise HTTPException(status_code=400, detail="Solo se permiten archivos PDF")
         
-        file_content = await file.read()
+        if imageFormat is not None and imageFormat.upper() not in ("JPEG", "PNG"):
+            raise HTTPException(status_code=400, detail="Formato de imagen no soportado")
         
-        result = celery_app.send_task('process_pdf_document', args=[file_content, srcLang, tgtLang, languageModel, confidence])
+        # El PDF se sube a S3 por partes desde el fichero temporal de la petición;
+        # la tarea sólo recibe la clave, no el contenido a través de Redis.
+        task_id = str(uuid.uuid4())
+        original_key = f"{task_id}/original.pdf"
+        await run_in_threadpool(upload_fileobj, original_key, file.file, "application/pdf")
         
-        task_id = result.id
+        celery_app.send_task('process_pdf_document', args=[original_key, srcLang, tgtLang, languageModel, confidence, imageFormat], task_id=task_id)
         
         logger.info(f"Tarea de orquestación iniciada con task_id único: {task_id}")
         
@@ -346,7 +363,7 @@ async def get_translation_data(task_id: str):
     :param task_id: El ID de la tarea.
     :type task_id: str
     :return: Los datos de traducción en formato JSON.
-    :rtype: dict
+    :rtype: Response
     :raises HTTPException: 404 si los datos no se encuentran.
     """
     try:
@@ -355,10 +372,8 @@ async def get_translation_data(task_id: str):
         if not key_exists(translation_key):
             raise HTTPException(status_code=404, detail="Datos de traducción no encontrados")
         
-        data_bytes = download_bytes(translation_key)
-        translation_data = json.loads(data_bytes.decode('utf-8'))
-        
-        return translation_data
+        # El JSON guardado se sirve tal cual: decodificarlo para volver a codificarlo no aporta nada.
+        return Response(content=download_bytes(translation_key), media_type="application/json")
         
     except HTTPException:
         raise
@@ -376,7 +391,7 @@ async def get_position_data(task_id: str):
     :param task_id: El ID de la tarea.
     :type task_id: str
     :return: Los datos de posición en formato JSON.
-    :rtype: dict
+    :rtype: Response
     :raises HTTPException: 404 si los datos no se encuentran.
     """
     try:
@@ -385,10 +400,7 @@ async def get_position_data(task_id: str):
         if not key_exists(position_key):
             raise HTTPException(status_code=404, detail="Datos de posición no encontrados")
         
-        data_bytes = download_bytes(position_key)
-        position_data = json.loads(data_bytes.decode('utf-8'))
-        
-        return position_data
+        return Response(content=download_bytes(position_key), media_type="application/json")
         
     except HTTPException:
         raise
@@ -418,14 +430,23 @@ async def update_translation_data(task_id: str, translation_data: TranslationDat
         if not key_exists(position_key):
             raise HTTPException(status_code=404, detail="Datos de posición no encontrados")
         
-        position_data_bytes = download_bytes(position_key)
-        position_data = json.loads(position_data_bytes.decode('utf-8'))
+        position_data = orjson.loads(download_bytes(position_key))
         
         translation_key = f"{task_id}/translated/translated_translation_data.json"
-        updated_data = json.dumps(translation_data.dict(), ensure_ascii=False, indent=2).encode()
-        upload_bytes(translation_key, updated_data, "application/json")
-        
-        result = celery_app.send_task('regenerate_pdf_from_storage', args=[task_id, translation_data.dict(), position_data])
+        upload_bytes(translation_key, orjson.dumps(translation_data.dict()), "application/json")
+        
+        # Los documentos anteriores no guardan los idiomas junto a las posiciones;
+        # se leen entonces de los metadatos, que son mucho más pequeños que los datos de traducción.
+        tgt_lang = position_data.get("meta", {}).get("tgt_lang")
+        metadata_key = f"{task_id}/translated/metadata.json"
+        if tgt_lang is None and key_exists(metadata_key):
+            tgt_lang = orjson.loads(download_bytes(metadata_key)).get("tgt_lang")
+        
+        result = celery_app.send_task(
+            'regenerate_pdf_from_storage',
+            args=[task_id, translation_data.dict(), position_data],
+            kwargs={"tgt_lang": tgt_lang}
+        )
         task_result = result.get(timeout=60)
         
         if "error" in task_result:
@@ -9,7 +9,7 @@ from botocore.client import Config
 from botocore.exceptions import ClientError
 from io import BytesIO
 import logging
-from typing import Optional
+from typing import BinaryIO, Optional
 
 from urllib.parse import urlparse, urlunparse
 from ..config.settings import settings
@@ -27,7 +27,10 @@ _client = _session.client(
         signature_version="s3v4",
         s3={
             'addressing_style': 'path'  # Mejor compatibilidad con MinIO
-        }
+        },
+        # Sin checksums CRC32 por defecto (botocore >= 1.36): MinIO no siempre los admite
+        request_checksum_calculation="when_required",
+        response_checksum_validation="when_required",
     ),
     aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
     aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
@@ -79,6 +82,28 @@ def upload_bytes(key: str, data: bytes, content_type: Optional[str] = None):
         logger.error(f"Error uploading to {key}: {e}")
         raise
 
+def upload_fileobj(key: str, fileobj: BinaryIO, content_type: Optional[str] = None):
+    """Sube un objeto a S3 leyéndolo por partes desde un fichero abierto.
+
+    A diferencia de `upload_bytes`, no necesita el contenido completo en memoria:
+    boto3 lo envía en una subida multiparte cuando supera el umbral de 8 MiB.
+
+    :param key: La ruta completa (clave) donde se almacenará el objeto en el bucket.
+    :type key: str
+    :param fileobj: Objeto tipo fichero abierto en modo binario.
+    :type fileobj: BinaryIO
+    :param content_type: El tipo MIME del contenido (ej. 'application/pdf').
+    :type content_type: Optional[str]
+    :raises Exception: Propaga cualquier excepción ocurrida durante la subida.
+    """
+    try:
+        extra = {"ContentType": content_type} if content_type else {}
+        _client.upload_fileobj(fileobj, settings.AWS_S3_BUCKET, key, ExtraArgs=extra)
+        logger.info(f"Uploaded file object to s3://{settings.AWS_S3_BUCKET}/{key}")
+    except Exception as e:
+        logger.error(f"Error uploading to {key}: {e}")
+        raise
+
 def download_bytes(key: str) -> bytes:
     """Descarga un objeto de S3 como bytes.
 
@@ -41,14 +41,16 @@ autodoc_mock_imports = [
     "celery",
     "doclayout_yolo",
     "fastapi",
+    "httpx",
     "matplotlib",
     "numpy",
     "openai",
+    "orjson",
     "pandas",
-    "pdf2image",
     "PIL",
     "pydantic",
     "pydantic_settings",
+    "pymupdf",
     "pytesseract",
     "reportlab",
     "torch",
@@ -3,10 +3,34 @@
 Proporciona una función simple para extraer texto de una imagen utilizando
 la biblioteca Tesseract a través de su wrapper `pytesseract`.
 """
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
 import pytesseract
 from PIL import Image
 import logging
 
+from ...infrastructure.config.settings import settings
+
+_ocr_tempdir_lock = threading.Lock()
+
+@contextmanager
+def _ocr_tempdir():
+    """Dirige los ficheros temporales de `pytesseract` a `settings.OCR_TMP_DIR` durante la llamada.
+
+    `pytesseract` no permite indicar el directorio, así que se cambia `tempfile.tempdir`
+    solo mientras dura el OCR; el resto del worker sigue usando el directorio por defecto.
+    """
+    with _ocr_tempdir_lock:
+        os.makedirs(settings.OCR_TMP_DIR, exist_ok=True)
+        previous = tempfile.tempdir
+        tempfile.tempdir = settings.OCR_TMP_DIR
+        try:
+            yield
+        finally:
+            tempfile.tempdir = previous
+
 def extract_text_from_image(image: Image.Image) -> str:
     """Extrae texto de un objeto de imagen utilizando Tesseract OCR.
 
@@ -17,7 +41,8 @@ def extract_text_from_image(image: Image.Image) -> str:
     :rtype: str
     """
     try:
-        text = pytesseract.image_to_string(image)
+        with _ocr_tempdir():
+            text = pytesseract.image_to_string(image)
         return text.strip()
     except Exception as e:
         logging.error(f"Error al extraer texto de la imagen: {e}")
@@ -14,18 +14,18 @@ from typing import List, Any, Dict
 from PIL import Image
 from reportlab.lib.pagesizes import A4
 from reportlab.pdfgen import canvas
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.styles import ParagraphStyle
 from reportlab.platypus import Paragraph
 
 from .layout import merge_overlapping_text_regions, get_layouts_in_batch
 from .ocr import extract_text_from_image
-from .utils import adjust_paragraph_font_size, clean_text, get_font_for_language
+from .utils import adjust_paragraph_font_size, clean_text, get_base_paragraph_style, get_font_for_language
 
 logger = logging.getLogger(__name__)
 
 OCR_MARGIN_PERCENT = 0.015  # 1.5% de margen
 
-def extract_page_data_in_batch(page_images: List[Image.Image], confidence: float) -> List[Dict[str, Any]]:
+def extract_page_data_in_batch(page_images: List[Image.Image], confidence: float, dpi: int = 300) -> List[Dict[str, Any]]:
     """Procesa un lote de imágenes de página para extraer texto y layout.
 
     Esta es una función clave para el rendimiento del worker. Realiza la
@@ -37,6 +37,9 @@ def extract_page_data_in_batch(page_images: List[Image.Image], confidence: float
     :type page_images: List[Image.Image]
     :param confidence: El umbral de confianza para el modelo de detección de layout.
     :type confidence: float
+    :param dpi: Los DPI con los que se rasterizaron las páginas, usados para
+                convertir píxeles a puntos.
+    :type dpi: int
     :return: Una lista de diccionarios. Cada diccionario contiene los datos
              extraídos de una página, incluyendo regiones de texto, regiones de
              imagen y dimensiones de la página.
@@ -57,11 +60,10 @@ def extract_page_data_in_batch(page_images: List[Image.Image], confidence: float
     # 2. Procesamiento por páginas (OCR y ensamblaje)
     start_ocr_total = time.time()
     for i, page_image in enumerate(page_images):
-        logger.info(f"Procesando OCR para página {i+1}/{len(page_images)}")
+        logger.debug("Procesando OCR para página %d/%d", i + 1, len(page_images))
         
         try:
             page_layout = layouts[i]
-            dpi = 300
             page_width_pts = (page_image.width / dpi) * 72
             page_height_pts = (page_image.height / dpi) * 72
             
@@ -148,8 +150,7 @@ def regenerate_pdf(output_pdf_path: str, translation_data: dict, position_data:
     """
     try:
         pdf_canvas = canvas.Canvas(output_pdf_path)
-        styles = getSampleStyleSheet()
-        base_style = styles["Normal"]
+        base_style = get_base_paragraph_style()
         font_name = get_font_for_language(target_language)
         
         translation_lookup = {
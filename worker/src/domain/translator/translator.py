@@ -7,16 +7,34 @@ para garantizar la fiabilidad de la salida.
 """
 import json
 import logging
-from typing import List
+from typing import List, Optional
+import httpx
 from pydantic import BaseModel
 from openai import AsyncOpenAI, APIConnectionError, RateLimitError, APIStatusError
 from ...infrastructure.config.settings import settings
 
-# Cliente OpenAI configurado para OpenRouter
-client = AsyncOpenAI(
-    base_url="https://openrouter.ai/api/v1",
-    api_key=settings.OPENAI_API_KEY,
-)
+def create_client() -> AsyncOpenAI:
+    """Crea un cliente OpenAI (OpenRouter) con un pool de conexiones amplio.
+
+    Las traducciones de todas las páginas de un lote se lanzan a la vez, así que
+    el pool admite muchas conexiones simultáneas y las mantiene vivas entre
+    peticiones para no repetir el handshake TCP/TLS en cada una. El cliente queda
+    ligado al bucle de eventos en el que se usa; debe cerrarse con `close()`.
+
+    :return: Un cliente asíncrono listo para usarse.
+    :rtype: AsyncOpenAI
+    """
+    return AsyncOpenAI(
+        base_url="https://openrouter.ai/api/v1",
+        api_key=settings.OPENAI_API_KEY,
+        http_client=httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=32, keepalive_expiry=60),
+            timeout=httpx.Timeout(120.0, connect=10.0),
+        ),
+    )
+
+# Cliente OpenAI configurado para OpenRouter, para llamadas sin cliente propio
+default_client = create_client()
 
 LANGUAGE_MAP = {
     'de': 'German', 'es-ct': 'Catalan', 'hr': 'Croatian', 'dk': 'Danish',
@@ -34,7 +52,7 @@ class TranslationResponse(BaseModel):
     """Define la estructura de respuesta esperada de la API de traducción."""
     translations: List[str]
 
-async def translate_text_async(texts: List[str], target_language: str, language_model: str = "openai/gpt-4o-mini") -> List[str]:
+async def translate_text_async(texts: List[str], target_language: str, language_model: str = "openai/gpt-4o-mini", client: Optional[AsyncOpenAI] = None) -> List[str]:
     """Traduce una lista de textos de forma asíncrona al idioma especificado.
 
     Utiliza la funcionalidad de `parse` (Structured Outputs) del cliente de OpenAI
@@ -47,6 +65,8 @@ async def translate_text_async(texts: List[str], target_language: str, language_
     :type target_language: str
     :param language_model: El identificador del modelo a utilizar (ej. 'openai/gpt-4o-mini').
     :type language_model: str
+    :param client: Cliente a reutilizar; si se omite se usa el cliente del módulo.
+    :type client: Optional[AsyncOpenAI]
     :return: Una lista de los textos traducidos. En caso de error, devuelve la
              lista de textos originales como fallback.
     :rtype: List[str]
@@ -68,7 +88,7 @@ async def translate_text_async(texts: List[str], target_language: str, language_
     )
 
     try:
-        response = await client.beta.chat.completions.parse(
+        response = await (client or default_client).beta.chat.completions.parse(
             model=language_model,
             messages=[
                 {"role": "system", "content": system_prompt},
@@ -4,8 +4,11 @@ Contiene funciones auxiliares para tareas comunes como la limpieza de texto,
 la gestión de fuentes para la generación de PDFs y el ajuste dinámico del
 tamaño de fuente para que el texto encaje en un cuadro delimitador.
 """
+import math
 import os
-from reportlab.lib.styles import ParagraphStyle
+from functools import lru_cache
+from typing import Optional
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
 from reportlab.platypus import Paragraph
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
@@ -31,6 +34,13 @@ pdfmetrics.registerFont(UnicodeCIDFont('HeiseiMin-W3'))  # Japanese
 pdfmetrics.registerFont(UnicodeCIDFont('HYSMyeongJo-Medium'))  # Korean
 pdfmetrics.registerFont(UnicodeCIDFont('STSong-Light'))  # Chinese
 
+# Fuentes CID por idioma; el resto de idiomas usa OpenSans
+CJK_FONTS = {
+    'jp': 'HeiseiMin-W3',
+    'kr': 'HYSMyeongJo-Medium',
+    'cn': 'STSong-Light',
+}
+
 def get_font_for_language(target_language: str) -> str:
     """Selecciona y devuelve el nombre de la fuente apropiada para un idioma.
 
@@ -43,12 +53,40 @@ def get_font_for_language(target_language: str) -> str:
     :return: El nombre de la fuente registrada en ReportLab.
     :rtype: str
     """
-    cjk_fonts = {
-        'jp': 'HeiseiMin-W3',
-        'kr': 'HYSMyeongJo-Medium',
-        'cn': 'STSong-Light',
-    }
-    return cjk_fonts.get(target_language, 'OpenSans')
+    return CJK_FONTS.get(target_language, 'OpenSans')
+
+@lru_cache(maxsize=1)
+def get_base_paragraph_style() -> ParagraphStyle:
+    """Devuelve el estilo 'Normal' de ReportLab, del que derivan todos los estilos de párrafo.
+
+    `getSampleStyleSheet` construye una hoja de estilos completa en cada llamada,
+    así que se crea una sola vez por proceso.
+
+    :return: El estilo base. No debe modificarse, ya que es compartido.
+    :rtype: ParagraphStyle
+    """
+    return getSampleStyleSheet()["Normal"]
+
+@lru_cache(maxsize=512)
+def get_paragraph_style(font_name: str, font_size: float) -> ParagraphStyle:
+    """Devuelve un estilo de párrafo compartido para una fuente y un tamaño dados.
+
+    ReportLab no modifica los estilos tras crear un `Paragraph`, así que una misma
+    instancia puede reutilizarse en todas las regiones con el mismo tamaño. El
+    interlineado es siempre 1.2 veces el tamaño de fuente.
+
+    :param font_name: El nombre de la fuente registrada en ReportLab.
+    :type font_name: str
+    :param font_size: El tamaño de fuente en puntos.
+    :type font_size: float
+    :return: El estilo de párrafo. No debe modificarse, ya que es compartido.
+    :rtype: ParagraphStyle
+    """
+    return ParagraphStyle(
+        name=f"Style_{font_name}_{font_size}",
+        parent=get_base_paragraph_style(), fontName=font_name,
+        fontSize=font_size, leading=font_size * 1.2
+    )
 
 def adjust_paragraph_font_size(paragraph: Paragraph, available_width: float, available_height: float, style: ParagraphStyle, min_font_size: int = 6, max_font_size: int = 72) -> Paragraph:
     """Ajusta dinámicamente el tamaño de fuente de un párrafo para que quepa en un área.
@@ -56,6 +94,8 @@ def adjust_paragraph_font_size(paragraph: Paragraph, available_width: float, ava
     Intenta encontrar el mayor tamaño de fuente posible sin que el párrafo
     exceda el alto disponible. Primero reduce la fuente si es necesario y
     luego la aumenta si hay espacio sobrante, dentro de los límites definidos.
+    Cada tamaño probado usa el estilo compartido de `get_paragraph_style`; el
+    estilo recibido no se modifica.
 
     :param paragraph: El objeto `Paragraph` de ReportLab a ajustar.
     :type paragraph: Paragraph
@@ -63,7 +103,7 @@ def adjust_paragraph_font_size(paragraph: Paragraph, available_width: float, ava
     :type available_width: float
     :param available_height: El alto máximo disponible para el párrafo.
     :type available_height: float
-    :param style: El estilo del párrafo que se modificará.
+    :param style: El estilo inicial del párrafo, del que se toman la fuente y el tamaño.
     :type style: ParagraphStyle
     :param min_font_size: El tamaño de fuente mínimo permitido.
     :type min_font_size: int
@@ -72,25 +112,106 @@ def adjust_paragraph_font_size(paragraph: Paragraph, available_width: float, ava
     :return: El objeto `Paragraph` con el tamaño de fuente ajustado.
     :rtype: Paragraph
     """
+    font_size = style.fontSize
     w, h = paragraph.wrap(available_width, available_height)
     
     # Reducir si no cabe
-    while h > available_height and style.fontSize > min_font_size:
-        style.fontSize -= 1
-        style.leading = style.fontSize * 1.2
-        paragraph = Paragraph(paragraph.text, style)
+    while h > available_height and font_size > min_font_size:
+        font_size -= 1
+        paragraph = Paragraph(paragraph.text, get_paragraph_style(style.fontName, font_size))
         w, h = paragraph.wrap(available_width, available_height)
     
     # Aumentar si sobra espacio
-    while h < available_height and style.fontSize < max_font_size:
-        style.fontSize += 1
-        style.leading = style.fontSize * 1.2
-        new_paragraph = Paragraph(paragraph.text, style)
+    while h < available_height and font_size < max_font_size:
+        new_paragraph = Paragraph(paragraph.text, get_paragraph_style(style.fontName, font_size + 1))
         w, h = new_paragraph.wrap(available_width, available_height)
         if h > available_height:
-            style.fontSize -= 1
-            style.leading = style.fontSize * 1.2
             break
+        font_size += 1
         paragraph = new_paragraph
         
-    return paragraph
\ No newline at end of file
+    return paragraph
+
+# Solo se memoizan textos de hasta esta longitud: las cabeceras, pies y leyendas que se
+# repiten son cortos, y los párrafos largos casi nunca se repiten pero ocuparían la caché
+FIT_MEMO_MAX_TEXT_LENGTH = 200
+
+def fit_paragraph_font_size(text: str, available_width: float, available_height: float, font_name: str, initial_font_size: float, min_font_size: int = 6, max_font_size: int = 72) -> float:
+    """Calcula el tamaño de fuente con el que un texto encaja en un área.
+
+    Aplica `adjust_paragraph_font_size` y devuelve solo el tamaño resultante, que
+    sí es seguro cachear (los objetos `Paragraph` tienen estado). Las dimensiones
+    se redondean a la baja a décimas de punto, de modo que cajas prácticamente
+    iguales comparten entrada y el tamaño obtenido sigue cabiendo en la real. Los
+    textos de hasta `FIT_MEMO_MAX_TEXT_LENGTH` caracteres se memoizan, así que los
+    repetidos (cabeceras, pies de página, leyendas) no vuelven a ajustarse; la
+    memoria de la caché queda acotada por entradas y por longitud.
+
+    :param text: El texto (marcado de `Paragraph`) a ajustar.
+    :type text: str
+    :param available_width: El ancho disponible.
+    :type available_width: float
+    :param available_height: El alto disponible.
+    :type available_height: float
+    :param font_name: El nombre de la fuente registrada en ReportLab.
+    :type font_name: str
+    :param initial_font_size: El tamaño de fuente desde el que empieza el ajuste.
+    :type initial_font_size: float
+    :param min_font_size: El tamaño de fuente mínimo permitido.
+    :type min_font_size: int
+    :param max_font_size: El tamaño de fuente máximo permitido.
+    :type max_font_size: int
+    :return: El tamaño de fuente ajustado.
+    :rtype: float
+    """
+    width = math.floor(available_width * 10) / 10
+    height = math.floor(available_height * 10) / 10
+    fit = _fit_paragraph_font_size_cached if len(text) <= FIT_MEMO_MAX_TEXT_LENGTH else _fit_paragraph_font_size
+    return fit(text, width, height, font_name, initial_font_size, min_font_size, max_font_size)
+
+def _fit_paragraph_font_size(text: str, available_width: float, available_height: float, font_name: str, initial_font_size: float, min_font_size: int, max_font_size: int) -> float:
+    """Ajusta el texto con `adjust_paragraph_font_size` sobre dimensiones ya cuantizadas."""
+    style = get_paragraph_style(font_name, initial_font_size)
+    paragraph = adjust_paragraph_font_size(Paragraph(text, style), available_width, available_height, style, min_font_size, max_font_size)
+    return paragraph.style.fontSize
+
+_fit_paragraph_font_size_cached = lru_cache(maxsize=4096)(_fit_paragraph_font_size)
+
+def fit_single_line_font_size(text: str, available_width: float, available_height: float, font_name: str, initial_font_size: float, max_font_size: int = 72) -> Optional[float]:
+    """Calcula el tamaño de fuente de un texto que cabe en una sola línea, sin usar `Paragraph`.
+
+    Reproduce el resultado de `adjust_paragraph_font_size` para el caso de una
+    única línea (mismo tamaño inicial, pasos de 1 punto, interlineado 1.2) midiendo
+    solo el ancho del texto. Devuelve `None` cuando el texto contiene marcado o no
+    cabe en una línea al tamaño inicial, en cuyo caso debe usarse un `Paragraph`.
+
+    :param text: El texto a dibujar.
+    :type text: str
+    :param available_width: El ancho disponible.
+    :type available_width: float
+    :param available_height: El alto disponible.
+    :type available_height: float
+    :param font_name: El nombre de la fuente registrada en ReportLab.
+    :type font_name: str
+    :param initial_font_size: El tamaño de fuente desde el que empieza el ajuste.
+    :type initial_font_size: float
+    :param max_font_size: El tamaño de fuente máximo permitido.
+    :type max_font_size: int
+    :return: El tamaño de fuente, o `None` si el texto requiere un `Paragraph`.
+    :rtype: Optional[float]
+    """
+    if "<" in text or "&" in text:
+        return None
+
+    def fits_width(font_size: float) -> bool:
+        # Paragraph permite comprimir los espacios entre palabras (spaceShrinkage)
+        shrinkable = text.count(" ") * pdfmetrics.stringWidth(" ", font_name, font_size)
+        shrinkage = get_paragraph_style(font_name, font_size).spaceShrinkage
+        return pdfmetrics.stringWidth(text, font_name, font_size) - shrinkage * shrinkable <= available_width
+
+    font_size = initial_font_size
+    if font_size * 1.2 > available_height or not fits_width(font_size):
+        return None
+    while font_size < max_font_size and (font_size + 1) * 1.2 <= available_height and fits_width(font_size + 1):
+        font_size += 1
+    return font_size
@@ -11,6 +11,31 @@ class Settings(BaseSettings):
     AWS_REGION: str = 'us-east-1'
     AWS_S3_USE_SSL: bool = False
     TRANSLATED_TTL_DAYS: int = 7
+    S3_MAX_POOL_CONNECTIONS: int = 64
+    S3_TRANSFER_WORKERS: int = 32  # Hilos por tarea para subidas/descargas concurrentes
+
+    # Páginas por tarea de lote (cada mensaje de Celery lleva un lote completo)
+    PAGE_PROCESSING_BATCH_SIZE: int = 16
+
+    # Rasterización de páginas
+    RASTER_DPI: int = 200
+    PAGE_IMAGE_FORMAT: str = "JPEG"  # "PNG" para documentos de dibujo lineal
+    JPEG_QUALITY: int = 85
+    # Hilos por tarea para codificar recortes de imagen; cada proceso prefork tiene los suyos,
+    # así que se mantiene bajo en lugar de escalar con los núcleos
+    REGION_ENCODE_WORKERS: int = 2
+
+    # Caché local (tmpfs) de objetos descargados, compartida por los procesos del worker
+    LOCAL_CACHE_DIR: str = "/dev/shm/pdftrans"
+    LOCAL_CACHE_MAX_BYTES: int = 2 * 1024 ** 3
+    LOCAL_CACHE_MIN_FREE_BYTES: int = 512 * 1024 ** 2  # Margen libre en el montaje de la caché
+
+    # Ficheros temporales que pytesseract intercambia con tesseract (pequeños y efímeros)
+    OCR_TMP_DIR: str = "/dev/shm/ocr"
+
+    # Ficheros temporales de los PDF grandes: en disco, no en el tmpfs de TMPDIR,
+    # que cuenta como memoria del contenedor
+    PDF_SPOOL_DIR: str = "/var/tmp"
     
     # Configuración OpenAI
     OPENAI_API_KEY: Optional[str] = None
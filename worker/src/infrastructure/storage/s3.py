@@ -1,13 +1,18 @@
+import hashlib
+import os
+import tempfile
 import boto3
+from boto3.s3.transfer import TransferConfig
 from botocore.client import Config
 from botocore.exceptions import ClientError
 from io import BytesIO
 import logging
-from typing import Optional
+from typing import BinaryIO, Dict, Optional, Tuple
 
 from urllib.parse import urlparse, urlunparse
 from ..config.settings import settings
 
+# Las trazas por objeto van a DEBUG: en un documento grande hay varias por página
 logger = logging.getLogger(__name__)
 
 # Configuración global del cliente S3
@@ -21,12 +26,31 @@ _client = _session.client(
         signature_version="s3v4",
         s3={
             'addressing_style': 'path'  # Compatibilidad con MinIO
-        }
+        },
+        # Pool amplio: las subidas/descargas se hacen en paralelo desde varios hilos
+        max_pool_connections=settings.S3_MAX_POOL_CONNECTIONS,
+        tcp_keepalive=True,
+        retries={'mode': 'adaptive', 'max_attempts': 5},
+        # botocore >= 1.36 añade checksums CRC32 por defecto que MinIO no siempre
+        # devuelve/valida, lo que provocaba FlexibleChecksumError y reintentos.
+        request_checksum_calculation="when_required",
+        response_checksum_validation="when_required",
     ),
     aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
     aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
 )
 
+# Fracción del límite hasta la que se desaloja al superarlo
+_CACHE_EVICT_TARGET = 0.9
+
+# Subidas multiparte en paralelo para objetos grandes (p. ej. el PDF final)
+_transfer_config = TransferConfig(
+    multipart_threshold=8 * 1024 * 1024,
+    multipart_chunksize=8 * 1024 * 1024,
+    max_concurrency=8,
+    use_threads=True,
+)
+
 def ensure_bucket_exists():
     """Crear bucket si no existe"""
     try:
@@ -43,19 +67,29 @@ def ensure_bucket_exists():
 
 def upload_bytes(key: str, data: bytes, content_type: Optional[str] = None):
     """Subir bytes a S3"""
+    _put_object(key, data, content_type)
+
+def _put_object(key: str, data: bytes, content_type: Optional[str] = None) -> str:
+    """Subir bytes a S3 y devolver el ETag del objeto"""
     try:
         extra = {"ContentType": content_type} if content_type else {}
         
         # Evitar ChecksumAlgorithm con MinIO
-        _client.put_object(Bucket=settings.AWS_S3_BUCKET, Key=key, Body=data, **extra)
-        logger.info(f"Uploaded {len(data)} bytes to s3://{settings.AWS_S3_BUCKET}/{key}")
-        
-        # Verificar que el archivo se subió correctamente
-        if key_exists(key):
-            logger.info(f"Upload verified for {key}")
-        else:
-            logger.warning(f"Upload verification failed for {key}")
-            
+        response = _client.put_object(Bucket=settings.AWS_S3_BUCKET, Key=key, Body=data, **extra)
+        logger.debug("Uploaded %d bytes to s3://%s/%s", len(data), settings.AWS_S3_BUCKET, key)
+        return response["ETag"].strip('"')
+    except Exception as e:
+        logger.error(f"Error uploading to {key}: {e}")
+        raise
+
+def upload_fileobj(key: str, fileobj: BinaryIO, content_type: Optional[str] = None, metadata: Optional[Dict[str, str]] = None):
+    """Subir un objeto tipo archivo a S3 sin copiar su contenido a bytes, con metadatos opcionales"""
+    try:
+        extra = {"ContentType": content_type} if content_type else {}
+        if metadata:
+            extra["Metadata"] = metadata
+        _client.upload_fileobj(fileobj, settings.AWS_S3_BUCKET, key, ExtraArgs=extra, Config=_transfer_config)
+        logger.debug("Uploaded file object to s3://%s/%s", settings.AWS_S3_BUCKET, key)
     except Exception as e:
         logger.error(f"Error uploading to {key}: {e}")
         raise
@@ -65,12 +99,137 @@ def download_bytes(key: str) -> bytes:
     try:
         obj = _client.get_object(Bucket=settings.AWS_S3_BUCKET, Key=key)
         data = obj["Body"].read()
-        logger.info(f"Downloaded {len(data)} bytes from s3://{settings.AWS_S3_BUCKET}/{key}")
+        logger.debug("Downloaded %d bytes from s3://%s/%s", len(data), settings.AWS_S3_BUCKET, key)
         return data
     except Exception as e:
         logger.error(f"Error downloading from {key}: {e}")
         raise
 
+def cached_download_bytes(key: str) -> bytes:
+    """Descargar bytes de S3 a través de una caché local validada por ETag.
+
+    La caché vive en `settings.LOCAL_CACHE_DIR` (tmpfs por defecto) y la comparten
+    todos los procesos del worker del contenedor. Con copia local la descarga es un
+    GET condicional (`IfNoneMatch`): mientras el objeto no cambie, S3 responde 304
+    sin cuerpo y se usa la copia; sin ella es un GET normal, sin HEAD previo.
+    """
+    path = _cache_path(key)
+    cached = _read_cache_entry(path)
+    extra = {"IfNoneMatch": f'"{cached[0]}"'} if cached else {}
+    try:
+        obj = _client.get_object(Bucket=settings.AWS_S3_BUCKET, Key=key, **extra)
+    except ClientError as e:
+        if cached and e.response['Error']['Code'] in ("304", "NotModified"):
+            try:
+                os.utime(path)  # El mtime marca el último acceso para el desalojo LRU
+            except OSError:
+                pass  # Otro proceso la ha desalojado; los datos ya están en memoria
+            logger.debug("Cache hit for s3://%s/%s", settings.AWS_S3_BUCKET, key)
+            return cached[1]
+        logger.error(f"Error downloading from {key}: {e}")
+        raise
+    except Exception as e:
+        logger.error(f"Error downloading from {key}: {e}")
+        raise
+
+    data = obj["Body"].read()
+    logger.debug("Downloaded %d bytes from s3://%s/%s", len(data), settings.AWS_S3_BUCKET, key)
+    try:
+        _store_in_cache(path, obj["ETag"].strip('"'), data)
+    except OSError as e:
+        logger.warning(f"Could not cache {key} locally: {e}")
+    return data
+
+def cached_upload_bytes(key: str, data: bytes, content_type: Optional[str] = None):
+    """Subir bytes a S3 y dejarlos en la caché local con el ETag devuelto.
+
+    Un `cached_download_bytes` posterior de la misma clave en este host recibe un 304.
+    """
+    etag = _put_object(key, data, content_type)
+    try:
+        _store_in_cache(_cache_path(key), etag, data)
+    except OSError as e:
+        logger.warning(f"Could not cache {key} locally: {e}")
+
+def _cache_path(key: str) -> str:
+    """Ruta de la entrada de caché de una clave"""
+    return os.path.join(settings.LOCAL_CACHE_DIR, hashlib.blake2b(key.encode(), digest_size=16).hexdigest())
+
+def _read_cache_entry(path: str) -> Optional[Tuple[str, bytes]]:
+    """Leer una entrada de caché como (ETag, datos), o None si no existe"""
+    try:
+        with open(path, "rb") as f:
+            etag = f.readline().rstrip(b"\n").decode()
+            return etag, f.read()
+    except FileNotFoundError:
+        return None
+
+def _store_in_cache(path: str, etag: str, data: bytes):
+    """Escribir una entrada (ETag en la primera línea y después los datos) de forma atómica.
+
+    Todos los procesos del worker escriben en el mismo directorio, así que el espacio
+    se mide en el propio sistema de ficheros con `os.statvfs` (una llamada, sin
+    recorrer el directorio). Se desaloja cuando lo ocupado supera
+    `settings.LOCAL_CACHE_MAX_BYTES` o lo libre baja de
+    `settings.LOCAL_CACHE_MIN_FREE_BYTES`; la caché debe estar en un montaje propio
+    (el tmpfs de `/dev/shm` en el worker) para que lo ocupado sea el de la caché.
+    """
+    cache_dir = os.path.dirname(path)
+    # Sin memoizar: si alguien borra el directorio, la siguiente escritura lo recrea
+    os.makedirs(cache_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(etag.encode() + b"\n")
+            f.write(data)
+        os.replace(tmp_path, path)
+    except OSError:
+        os.unlink(tmp_path)
+        raise
+
+    usage = os.statvfs(cache_dir)
+    free = usage.f_bavail * usage.f_frsize
+    used = (usage.f_blocks - usage.f_bfree) * usage.f_frsize
+    if used > settings.LOCAL_CACHE_MAX_BYTES or free < settings.LOCAL_CACHE_MIN_FREE_BYTES:
+        _evict_cache(cache_dir, free)
+
+def _evict_cache(cache_dir: str, free: int) -> int:
+    """Desalojar las entradas menos usadas y devolver el tamaño que queda en la caché.
+
+    Se desaloja hasta `_CACHE_EVICT_TARGET` del límite y, además, lo necesario para
+    recuperar `settings.LOCAL_CACHE_MIN_FREE_BYTES` libres, de modo que el siguiente
+    recorrido no llegue con la siguiente escritura.
+    """
+    entries = []
+    for entry in os.scandir(cache_dir):
+        if entry.is_file() and not entry.name.endswith(".tmp"):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+    total = sum(size for _, size, _ in entries)
+    to_free = max(total - settings.LOCAL_CACHE_MAX_BYTES * _CACHE_EVICT_TARGET, settings.LOCAL_CACHE_MIN_FREE_BYTES - free)
+    for _, size, entry_path in sorted(entries):
+        if to_free <= 0:
+            break
+        try:
+            os.unlink(entry_path)
+            total -= size
+            to_free -= size
+        except FileNotFoundError:
+            pass
+    return total
+
+def get_object_metadata(key: str) -> Optional[Dict[str, str]]:
+    """Devuelve los metadatos de usuario de un objeto, o None si no existe"""
+    try:
+        return _client.head_object(Bucket=settings.AWS_S3_BUCKET, Key=key)["Metadata"]
+    except ClientError as e:
+        if int(e.response['Error']['Code']) == 404:
+            return None
+        raise
+
 def key_exists(key: str) -> bool:
     """Check if a key exists in S3"""
     try:
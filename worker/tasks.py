@@ -24,28 +24,35 @@ ensambla el documento traducido.
     a partir de datos de traducción previamente guardados y modificados.
 """
 from celery import Celery, group, chord
+from celery.signals import worker_process_init, worker_process_shutdown
 import os
+import hashlib
 import logging
-import json
-import time
-from typing import List, Dict, Any, Tuple
+import shutil
+import tempfile
+from datetime import datetime, timezone
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, List, Dict, Any, Iterable, Optional, Tuple, Union
 from io import BytesIO
 
+import pymupdf
+import orjson
 from botocore.exceptions import FlexibleChecksumError
+from openai import AsyncOpenAI
 from PIL import Image
-from pdf2image import convert_from_bytes
 from reportlab.pdfgen import canvas
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.platypus import Paragraph
 from reportlab.lib.utils import ImageReader
 import asyncio
 
 # Imports del proyecto
-from src.domain.translator.translator import translate_text_async
+from src.domain.translator.translator import create_client, translate_text_async
 from src.domain.translator.processor import extract_page_data_in_batch
-from src.domain.translator.utils import get_font_for_language, adjust_paragraph_font_size
+from src.domain.translator.utils import get_font_for_language, get_paragraph_style, fit_paragraph_font_size, fit_single_line_font_size
 from src.infrastructure.config.settings import MARGIN, settings
-from src.infrastructure.storage.s3 import upload_bytes, download_bytes
+from src.infrastructure.storage.s3 import upload_bytes, upload_fileobj, download_bytes, cached_upload_bytes, cached_download_bytes, get_object_metadata
 
 # Configuración de logging
 logging.basicConfig(level=logging.INFO)
@@ -58,104 +65,665 @@ celery_app = Celery(
     backend=os.getenv('CELERY_RESULT_BACKEND', 'redis://redis:6379/0')
 )
 
+celery_app.conf.update(
+    # Reparto equitativo: cada proceso reserva sólo la tarea que está ejecutando,
+    # de modo que los lotes de un chord no se quedan encolados tras uno lento.
+    task_acks_late=True,
+    worker_prefetch_multiplier=1,
+    worker_disable_rate_limits=True,
+    # Con acks tardíos, la tarea se reentrega si no se confirma en este plazo.
+    broker_transport_options={'visibility_timeout': 3600},
+    # msgpack es más compacto y rápido que JSON para los datos de traducción y posición
+    # que recibe la regeneración; se sigue aceptando JSON para mensajes anteriores.
+    task_serializer='msgpack',
+    result_serializer='msgpack',
+    accept_content=['msgpack', 'json'],
+)
+
 # CONSTANTES DE CONFIGURACIÓN
-PAGE_PROCESSING_BATCH_SIZE = 16
+PAGE_PROCESSING_BATCH_SIZE = settings.PAGE_PROCESSING_BATCH_SIZE
+MAX_TRANSFER_WORKERS = settings.S3_TRANSFER_WORKERS
+# PDFs finales por encima de este tamaño se vuelcan a un fichero temporal en vez de a memoria
+PDF_SPOOL_MAX_SIZE = 32 * 1024 * 1024
+# Documentos de hasta este número de páginas se procesan en la propia tarea orquestadora
+INLINE_PAGE_LIMIT = PAGE_PROCESSING_BATCH_SIZE
+# PDF parciales que el finalizador descarga por delante de la concatenación
+PARTIAL_PDF_PREFETCH = 2
+# Hilos para codificar los recortes de imagen mientras se renderizan los siguientes
+REGION_ENCODE_WORKERS = settings.REGION_ENCODE_WORKERS
+# Páginas con al menos estas regiones de imagen (y pequeñas) se dibujan como una única imagen compuesta
+REGION_COMPOSITE_MIN_REGIONS = 8
+
+# =============================================================================
+# BUCLE DE EVENTOS POR PROCESO
+# =============================================================================
+
+# Cada proceso del worker mantiene un bucle de eventos en un hilo propio y un cliente
+# de traducción ligado a él, de modo que las conexiones keep-alive sobreviven entre tareas.
+_event_loop: Optional[asyncio.AbstractEventLoop] = None
+_translation_client: Optional[AsyncOpenAI] = None
+
+async def _create_translation_client() -> AsyncOpenAI:
+    """Crea el cliente de traducción desde el propio bucle persistente."""
+    return create_client()
+
+@worker_process_init.connect
+def _start_event_loop(**kwargs):
+    """Arranca el bucle de eventos persistente del proceso y su cliente de traducción."""
+    global _event_loop, _translation_client
+    _event_loop = asyncio.new_event_loop()
+    threading.Thread(target=_event_loop.run_forever, name="asyncio-loop", daemon=True).start()
+    _translation_client = asyncio.run_coroutine_threadsafe(_create_translation_client(), _event_loop).result()
+
+@worker_process_shutdown.connect
+def _stop_event_loop(**kwargs):
+    """Cierra el cliente de traducción y detiene el bucle de eventos del proceso."""
+    global _event_loop, _translation_client
+    if _event_loop is None:
+        return
+    try:
+        if _translation_client is not None:
+            asyncio.run_coroutine_threadsafe(_translation_client.close(), _event_loop).result(timeout=5)
+    except Exception as e:
+        logger.warning(f"Error cerrando el cliente de traducción: {e}")
+    _event_loop.call_soon_threadsafe(_event_loop.stop)
+    _event_loop, _translation_client = None, None
+
+def _run_async(coroutine):
+    """Ejecuta una corrutina en el bucle persistente del proceso y espera su resultado.
+
+    Fuera de un proceso del pool (p. ej. con `--pool=solo`) no hay bucle persistente
+    y se recurre a `asyncio.run`.
+
+    :param coroutine: La corrutina a ejecutar.
+    :return: El resultado de la corrutina.
+    """
+    if _event_loop is None:
+        return asyncio.run(coroutine)
+    return asyncio.run_coroutine_threadsafe(coroutine, _event_loop).result()
 
 # =============================================================================
 # UTILIDADES PARA CONSTRUCCIÓN DE PDF
 # =============================================================================
 
-def build_translated_pdf(results_list: List[Dict[str, Any]], task_id: str, target_language: str) -> bytes:
+def build_translated_pdf(results_list: Iterable[Dict[str, Any]], task_id: str, target_language: str, source_pdf: Optional[bytes] = None, output: Optional[BinaryIO] = None) -> BinaryIO:
     """Construye un documento PDF a partir de una lista de datos de página procesados.
 
     Itera sobre los datos de cada página, dibuja las regiones de imagen recortadas
     y renderiza los párrafos de texto traducido en sus posiciones correspondientes.
+    Las regiones de imagen se renderizan directamente desde el PDF original, por
+    lo que no es necesario descargar las imágenes de página completas; el original
+    se descarga una sola vez y solo si alguna página tiene regiones de imagen.
 
-    :param results_list: Lista de diccionarios, cada uno representando una página
-                         con sus regiones de texto, imagen y dimensiones.
-    :type results_list: List[Dict[str, Any]]
-    :param task_id: El ID de la tarea, usado para descargar imágenes de página desde S3.
+    :param results_list: Diccionarios en orden de página, cada uno con sus regiones de
+                         texto, imagen y dimensiones. Se consumen de uno en uno, por lo
+                         que puede ser un iterador que los vaya produciendo.
+    :type results_list: Iterable[Dict[str, Any]]
+    :param task_id: El ID de la tarea, usado para descargar el PDF original desde S3.
     :type task_id: str
     :param target_language: El código del idioma de destino para seleccionar la fuente adecuada.
     :type target_language: str
-    :return: El documento PDF completo como un objeto de bytes.
-    :rtype: bytes
+    :param source_pdf: El PDF original, si ya está en memoria; así no se descarga de S3.
+    :type source_pdf: Optional[bytes]
+    :param output: Flujo binario en el que escribir el PDF; por defecto un `BytesIO`.
+    :type output: Optional[BinaryIO]
+    :return: El flujo de salida, rebobinado, con el documento PDF completo.
+    :rtype: BinaryIO
     """
-    buffer = BytesIO()
-    pdf_canvas = canvas.Canvas(buffer)
-    styles = getSampleStyleSheet()
-    base_style = styles["Normal"]
+    # El original solo se descarga y abre si alguna página tiene regiones de imagen.
+    source_doc = None
+    region_pool = None
+    buffer = output if output is not None else BytesIO()
+    # Los flujos de contenido se comprimen una sola vez al escribirlos: el texto de las
+    # páginas ocupa varias veces menos y los parciales viajan más rápido por S3.
+    pdf_canvas = canvas.Canvas(buffer, pageCompression=1)
     font_name = get_font_for_language(target_language)
     
-    for i, page_data in enumerate(results_list):
-        if page_data.get("error"):
-            logger.warning(f"Omitiendo página {i+1} por error: {page_data['error']}")
-            continue
+    try:
+        for i, page_data in enumerate(results_list):
+            if page_data.get("error"):
+                logger.warning(f"Omitiendo página {i+1} por error: {page_data['error']}")
+                continue
 
-        if not page_data.get("page_dimensions"):
-            logger.warning(f"Omitiendo página {i+1} por falta de dimensiones.")
-            continue
+            if not page_data.get("page_dimensions"):
+                logger.warning(f"Omitiendo página {i+1} por falta de dimensiones.")
+                continue
             
-        dims = page_data["page_dimensions"]
-        page_width, page_height = dims["width"], dims["height"]
-        pdf_canvas.setPageSize((page_width, page_height))
-        
-        pdf_canvas.setFillColorRGB(1, 1, 1)
-        pdf_canvas.rect(0, 0, page_width, page_height, fill=1, stroke=0)
-
-        for img_region in page_data.get("image_regions", []):
-            page_image_key = f"{task_id}/pages/page_{i:03d}.png"
-            try:
-                page_image_bytes = download_bytes(page_image_key)
-                page_image = Image.open(BytesIO(page_image_bytes))
-                
-                coords = img_region["coordinates"]
-                cropped_img = page_image.crop((
-                    max(coords["x1"] - MARGIN, 0), max(coords["y1"] - MARGIN, 0),
-                    min(coords["x2"] + MARGIN, page_image.width), min(coords["y2"] + MARGIN, page_image.height)
-                ))
-                
-                img_byte_arr = BytesIO()
-                cropped_img.save(img_byte_arr, format='PNG')
-                img_byte_arr.seek(0)
-                pos = img_region["position"]
-                pdf_canvas.drawImage(ImageReader(img_byte_arr), pos["x"], pos["y"], pos["width"], pos["height"])
-            except Exception as e:
-                logger.error(f"Error procesando imagen de región en página {i}: {e}")
+            dims = page_data["page_dimensions"]
+            page_width, page_height = dims["width"], dims["height"]
+            pdf_canvas.setPageSize((page_width, page_height))
 
-        for text_region in page_data.get("text_regions", []):
-            pos = text_region["position"]
-            paragraph_style = ParagraphStyle(
-                name=f"CustomStyle_p{i}_r{text_region['id']}",
-                parent=base_style, fontName=font_name,
-                fontSize=max(8, pos["height"] * 0.8), leading=max(8, pos["height"] * 0.8) * 1.2
-            )
-            p = Paragraph(text_region["translated_text"], paragraph_style)
-            p = adjust_paragraph_font_size(p, pos["width"], pos["height"], paragraph_style)
-            p.wrapOn(pdf_canvas, pos["width"], pos["height"])
-            p.drawOn(pdf_canvas, pos["x"], pos["y"])
+            # Las páginas de ReportLab ya son blancas: no hace falta pintar un fondo.
+            image_regions = page_data.get("image_regions", [])
+            if image_regions:
+                if source_doc is None:
+                    if source_pdf is None:
+                        source_pdf = _get_original_pdf(task_id)
+                    source_doc = pymupdf.open(stream=source_pdf, filetype="pdf")
+                if region_pool is None:
+                    region_pool = ThreadPoolExecutor(max_workers=REGION_ENCODE_WORKERS)
+                # La lista de visualización interpreta la página una sola vez para todas sus regiones.
+                page_display = source_doc[page_data.get("page_number", i)].get_displaylist()
+                if len(image_regions) >= REGION_COMPOSITE_MIN_REGIONS:
+                    # Muchas regiones pequeñas: un único renderizado y una única imagen para toda la página.
+                    # Si la composición falla, las regiones se dibujan una a una más abajo.
+                    try:
+                        regions_area = sum(r["position"]["width"] * r["position"]["height"] for r in image_regions)
+                        if regions_area < page_width * page_height * 0.5:
+                            composite = _render_region_composite(page_display, image_regions, page_height)
+                            pdf_canvas.drawImage(ImageReader(_encode_region_image(composite)), 0, 0, page_width, page_height)
+                            image_regions = []
+                    except Exception as e:
+                        logger.error(f"Error componiendo las imágenes de región en página {i}; se dibujan por separado: {e}")
+                # PyMuPDF y el lienzo solo se usan desde este hilo; la codificación de cada
+                # recorte (PIL libera el GIL) se solapa con el renderizado de los siguientes.
+                pending_regions = []
+                for img_region in image_regions:
+                    try:
+                        region_image = _render_region_image(page_display, img_region)
+                        pending_regions.append((img_region, region_pool.submit(_encode_region_image, region_image)))
+                    except Exception as e:
+                        logger.error(f"Error procesando imagen de región en página {i}: {e}")
+                for img_region, encoded_region in pending_regions:
+                    try:
+                        pos = img_region["position"]
+                        pdf_canvas.drawImage(ImageReader(encoded_region.result()), pos["x"], pos["y"], pos["width"], pos["height"])
+                    except Exception as e:
+                        logger.error(f"Error procesando imagen de región en página {i}: {e}")
+
+            for text_region in page_data.get("text_regions", []):
+                _draw_text_region(pdf_canvas, text_region, font_name)
         
-        pdf_canvas.showPage()
+            pdf_canvas.showPage()
 
-    pdf_canvas.save()
+        pdf_canvas.save()
+    finally:
+        if region_pool is not None:
+            region_pool.shutdown()
+        if source_doc is not None:
+            source_doc.close()
     buffer.seek(0)
-    return buffer.getvalue()
+    return buffer
+
+def _get_original_pdf(task_id: str) -> bytes:
+    """Descarga el PDF original de una tarea a través de la caché local.
+
+    El original de una tarea nunca cambia, y las regeneraciones sucesivas de un
+    mismo documento (cada edición del usuario) y los lotes que caen en el mismo
+    host vuelven a necesitarlo; la caché en tmpfs se comparte entre procesos y
+    está acotada en bytes, así que no se guarda además en memoria del proceso.
+
+    :param task_id: El ID de la tarea.
+    :type task_id: str
+    :return: El contenido del PDF original.
+    :rtype: bytes
+    """
+    return cached_download_bytes(f"{task_id}/original.pdf")
+
+def _new_pdf_output() -> BinaryIO:
+    """Crea el flujo de salida del PDF final.
+
+    Los documentos pequeños se quedan en memoria; al superar `PDF_SPOOL_MAX_SIZE`
+    el contenido pasa a un fichero temporal en `settings.PDF_SPOOL_DIR`, en disco,
+    de modo que un PDF de cientos de páginas no se mantiene entero en memoria
+    mientras se sube. No se usa `TMPDIR`, que en el worker es tmpfs.
+
+    :return: Un fichero temporal con volcado a disco.
+    :rtype: BinaryIO
+    """
+    return tempfile.SpooledTemporaryFile(max_size=PDF_SPOOL_MAX_SIZE, dir=settings.PDF_SPOOL_DIR)
+
+def _store_partial_pdf(task_id: str, first_page: int, results_list: List[Dict[str, Any]], target_language: str) -> Optional[str]:
+    """Dibuja las páginas de un lote en un PDF parcial y lo sube a S3.
+
+    :param task_id: El ID de la tarea global, usado como prefijo de la clave.
+    :type task_id: str
+    :param first_page: Número (base 0) de la primera página del lote, usado en la clave.
+    :type first_page: int
+    :param results_list: Los datos procesados de las páginas del lote, en orden.
+    :type results_list: List[Dict[str, Any]]
+    :param target_language: El código del idioma de destino.
+    :type target_language: str
+    :return: La clave de S3 del PDF parcial, o `None` si ninguna página del lote se puede dibujar.
+    :rtype: Optional[str]
+    """
+    # Un lote sin páginas válidas no aporta nada (ReportLab guardaría una página en blanco).
+    if not any(not r.get("error") and r.get("page_dimensions") for r in results_list):
+        return None
+    partial_key = f"{task_id}/partials/pages_{first_page:03d}.pdf"
+    with build_translated_pdf(results_list, task_id, target_language, output=_new_pdf_output()) as partial_pdf:
+        upload_fileobj(partial_key, partial_pdf, content_type="application/pdf")
+    return partial_key
+
+def _merge_partial_pdfs(partial_pdfs: Iterable[bytes], output: Optional[BinaryIO] = None) -> BinaryIO:
+    """Concatena, en orden, los PDF parciales de los lotes en el documento final.
+
+    PyMuPDF no puede guardar en un `SpooledTemporaryFile` (usa su atributo `name`
+    como ruta), así que el documento se guarda en un fichero temporal con nombre
+    y se copia por bloques al flujo de salida, sin pasar entero por memoria.
+
+    :param partial_pdfs: El contenido de cada PDF parcial, en orden de página. Se
+                         consumen de uno en uno, por lo que puede ser un iterador.
+    :type partial_pdfs: Iterable[bytes]
+    :param output: Flujo binario en el que escribir el PDF; por defecto `_new_pdf_output()`.
+    :type output: Optional[BinaryIO]
+    :return: El flujo de salida, rebobinado, con el documento completo.
+    :rtype: BinaryIO
+    """
+    output = output if output is not None else _new_pdf_output()
+    merged_doc = pymupdf.open()
+    fd, merged_path = tempfile.mkstemp(suffix=".pdf", dir=settings.PDF_SPOOL_DIR)
+    os.close(fd)
+    try:
+        for data in partial_pdfs:
+            with pymupdf.open(stream=data, filetype="pdf") as partial_doc:
+                merged_doc.insert_pdf(partial_doc)
+        # garbage=3 fusiona los objetos duplicados entre parciales (fuentes, estilos).
+        merged_doc.save(merged_path, garbage=3)
+        with open(merged_path, "rb") as merged_file:
+            shutil.copyfileobj(merged_file, output)
+    finally:
+        merged_doc.close()
+        os.unlink(merged_path)
+    output.seek(0)
+    return output
+
+def _prefetch(executor: ThreadPoolExecutor, fn, items: Iterable[Any], window: int) -> Iterable[Any]:
+    """Aplica `fn` a cada elemento en el executor, en orden, con un máximo de `window` resultados adelantados.
+
+    :param executor: El pool de hilos en el que se ejecuta `fn`.
+    :type executor: ThreadPoolExecutor
+    :param fn: La función a aplicar a cada elemento.
+    :param items: Los elementos, en el orden en que se quieren los resultados.
+    :type items: Iterable[Any]
+    :param window: Número máximo de llamadas en curso o pendientes de consumir.
+    :type window: int
+    :return: Un generador con los resultados en el orden de `items`.
+    :rtype: Iterable[Any]
+    """
+    pending = deque()
+    for item in items:
+        pending.append(executor.submit(fn, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+def _draw_text_region(pdf_canvas: canvas.Canvas, text_region: Dict[str, Any], font_name: str):
+    """Dibuja el texto traducido de una región en su posición.
+
+    Los textos de una sola línea se dibujan con un objeto de texto de bajo nivel,
+    evitando la maquinaria de `Paragraph`; el resto se ajusta y dibuja como párrafo.
+    En ambos casos la línea base queda donde la dejaría el `Paragraph`.
+
+    :param pdf_canvas: El lienzo de ReportLab sobre el que se dibuja.
+    :type pdf_canvas: canvas.Canvas
+    :param text_region: La región con `translated_text` y `position`.
+    :type text_region: Dict[str, Any]
+    :param font_name: El nombre de la fuente registrada en ReportLab.
+    :type font_name: str
+    """
+    pos = text_region["position"]
+    text = " ".join(text_region["translated_text"].split())
+    # Tamaños enteros: el ajuste avanza de punto en punto, así que todos los tamaños
+    # probados son enteros y los estilos y ajustes cacheados se comparten entre regiones.
+    initial_font_size = int(max(8, pos["height"] * 0.8))
+    
+    font_size = fit_single_line_font_size(text, pos["width"], pos["height"], font_name, initial_font_size)
+    if font_size is not None:
+        text_object = pdf_canvas.beginText(pos["x"], pos["y"] + font_size * 1.2 - font_size)
+        text_object.setFont(font_name, font_size, leading=font_size * 1.2)
+        text_object.setFillColorRGB(0, 0, 0)
+        text_object.textLine(text)
+        pdf_canvas.drawText(text_object)
+        return
+    
+    font_size = fit_paragraph_font_size(text_region["translated_text"], pos["width"], pos["height"], font_name, initial_font_size)
+    p = Paragraph(text_region["translated_text"], get_paragraph_style(font_name, font_size))
+    p.wrapOn(pdf_canvas, pos["width"], pos["height"])
+    p.drawOn(pdf_canvas, pos["x"], pos["y"])
+
+def _render_region_image(page_display: "pymupdf.DisplayList", img_region: Dict[str, Any]) -> Image.Image:
+    """Renderiza una región de imagen directamente desde la página vectorial del PDF.
+
+    Las coordenadas de la región están en píxeles de la página rasterizada; la
+    escala a puntos se deduce de la propia región (`position` frente a
+    `coordinates`), así que funciona con independencia de los DPI usados.
+
+    :param page_display: La lista de visualización de la página del PDF original.
+    :type page_display: pymupdf.DisplayList
+    :param img_region: La región de imagen con sus `coordinates` y `position`.
+    :type img_region: Dict[str, Any]
+    :return: El recorte como imagen RGB de PIL, sin codificar.
+    :rtype: Image.Image
+    """
+    zoom = settings.RASTER_DPI / 72
+    clip = _region_clip(page_display, img_region)
+    return _pixmap_to_image(page_display.get_pixmap(matrix=pymupdf.Matrix(zoom, zoom), clip=clip, alpha=False))
+
+def _region_clip(page_display: "pymupdf.DisplayList", img_region: Dict[str, Any]) -> "pymupdf.Rect":
+    """Calcula el rectángulo, en puntos de la página original, que se recorta para una región.
+
+    :param page_display: La lista de visualización de la página del PDF original.
+    :type page_display: pymupdf.DisplayList
+    :param img_region: La región de imagen con sus `coordinates` y `position`.
+    :type img_region: Dict[str, Any]
+    :return: La caja de la región ampliada en `MARGIN` y limitada a la página.
+    :rtype: pymupdf.Rect
+    """
+    coords, pos = img_region["coordinates"], img_region["position"]
+    scale = pos["width"] / max(coords["x2"] - coords["x1"], 1e-6)
+    return pymupdf.Rect(
+        max(coords["x1"] - MARGIN, 0) * scale, max(coords["y1"] - MARGIN, 0) * scale,
+        (coords["x2"] + MARGIN) * scale, (coords["y2"] + MARGIN) * scale
+    ) & page_display.rect
+
+def _render_region_composite(page_display: "pymupdf.DisplayList", image_regions: List[Dict[str, Any]], page_height: float) -> Image.Image:
+    """Compone todas las regiones de imagen de una página sobre un lienzo blanco del tamaño de la página.
+
+    El resultado equivale a dibujar cada recorte en su `position`, pero con un solo
+    renderizado de la página y una sola imagen en el PDF, lo que compensa en páginas
+    con muchas regiones pequeñas.
+
+    :param page_display: La lista de visualización de la página del PDF original.
+    :type page_display: pymupdf.DisplayList
+    :param image_regions: Las regiones de imagen de la página, en orden de dibujo.
+    :type image_regions: List[Dict[str, Any]]
+    :param page_height: El alto de la página de salida en puntos.
+    :type page_height: float
+    :return: La composición como imagen RGB de PIL, sin codificar.
+    :rtype: Image.Image
+    """
+    zoom = settings.RASTER_DPI / 72
+    page_image = _pixmap_to_image(page_display.get_pixmap(matrix=pymupdf.Matrix(zoom, zoom), alpha=False))
+    composite = Image.new("RGB", page_image.size, "white")
+    for img_region in image_regions:
+        clip = _region_clip(page_display, img_region)
+        if clip.is_empty:
+            continue
+        pos = img_region["position"]
+        crop = page_image.crop(tuple(round(v * zoom) for v in clip))
+        size = (max(1, round(pos["width"] * zoom)), max(1, round(pos["height"] * zoom)))
+        composite.paste(crop.resize(size), (round(pos["x"] * zoom), round((page_height - pos["y"] - pos["height"]) * zoom)))
+    return composite
+
+def _encode_region_image(image: Image.Image) -> Union[BytesIO, Image.Image]:
+    """Prepara un recorte de región para incrustarlo en el PDF.
+
+    En JPEG se devuelve el recorte codificado, que ReportLab incrusta tal cual
+    sin decodificarlo. En PNG se devuelve la imagen de PIL sin codificar: ReportLab
+    la comprime por su cuenta, y codificarla antes en PNG solo añadiría un ciclo
+    completo de codificación y decodificación.
+
+    :param image: El recorte renderizado por `_render_region_image`.
+    :type image: Image.Image
+    :return: Un buffer con el recorte en JPEG, o la imagen sin codificar en modo PNG.
+    :rtype: Union[BytesIO, Image.Image]
+    """
+    if settings.PAGE_IMAGE_FORMAT.upper() == "PNG":
+        return image
+    buffer = BytesIO()
+    image.save(buffer, format="JPEG", quality=settings.JPEG_QUALITY)
+    buffer.seek(0)
+    return buffer
+
+def _render_page(page: "pymupdf.Page") -> "pymupdf.Pixmap":
+    """Rasteriza una página del PDF en RGB a `settings.RASTER_DPI`.
+
+    :param page: La página del documento abierto con PyMuPDF.
+    :type page: pymupdf.Page
+    :return: El pixmap RGB de la página, sin canal alfa.
+    :rtype: pymupdf.Pixmap
+    """
+    zoom = settings.RASTER_DPI / 72
+    return page.get_pixmap(matrix=pymupdf.Matrix(zoom, zoom), colorspace=pymupdf.csRGB, alpha=False)
+
+def _pixmap_to_image(pix: "pymupdf.Pixmap") -> Image.Image:
+    """Convierte un pixmap RGB en una imagen de PIL sin pasar por ningún códec.
+
+    :param pix: El pixmap RGB de la página.
+    :type pix: pymupdf.Pixmap
+    :return: La imagen en modo RGB.
+    :rtype: Image.Image
+    """
+    return Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+
+def _encode_page_image(image: Image.Image, image_format: Optional[str] = None) -> Tuple[bytes, str, str]:
+    """Codifica la imagen de una página para subirla a S3.
+
+    Se usa JPEG por defecto, que en páginas escaneadas ocupa varias veces menos
+    que PNG; `settings.PAGE_IMAGE_FORMAT = "PNG"` (o `image_format` para un
+    trabajo concreto) lo mantiene sin pérdida para documentos de dibujo lineal,
+    donde los artefactos de JPEG perjudican al OCR. La codificación la hace PIL,
+    que libera el GIL, así que varias páginas se codifican en paralelo.
+
+    :param image: La imagen RGB de la página.
+    :type image: Image.Image
+    :param image_format: 'JPEG' o 'PNG'; si se omite se usa `settings.PAGE_IMAGE_FORMAT`.
+    :type image_format: Optional[str]
+    :return: Una tupla `(datos, extensión, content_type)`.
+    :rtype: Tuple[bytes, str, str]
+    """
+    buffer = BytesIO()
+    if (image_format or settings.PAGE_IMAGE_FORMAT).upper() == "PNG":
+        image.save(buffer, format="PNG")
+        return buffer.getvalue(), "png", "image/png"
+    image.save(buffer, format="JPEG", quality=settings.JPEG_QUALITY)
+    return buffer.getvalue(), "jpg", "image/jpeg"
+
+def _encode_and_upload_page(task_id: str, idx: int, pix: "pymupdf.Pixmap", image_format: Optional[str] = None) -> str:
+    """Convierte, codifica y sube una página ya rasterizada; pensada para ejecutarse en un pool.
+
+    :param task_id: El ID de la tarea, usado como prefijo de la clave.
+    :type task_id: str
+    :param idx: Índice (base 0) de la página dentro del documento.
+    :type idx: int
+    :param pix: El pixmap RGB de la página.
+    :type pix: pymupdf.Pixmap
+    :param image_format: 'JPEG' o 'PNG'; si se omite se usa `settings.PAGE_IMAGE_FORMAT`.
+    :type image_format: Optional[str]
+    :return: La clave de S3 donde se ha guardado la imagen.
+    :rtype: str
+    """
+    return _upload_page_image(task_id, idx, *_encode_page_image(_pixmap_to_image(pix), image_format))
+
+def _upload_page_image(task_id: str, idx: int, data: bytes, extension: str, content_type: str) -> str:
+    """Sube a S3 una imagen de página ya codificada y la guarda en la caché local.
+
+    :param task_id: El ID de la tarea, usado como prefijo de la clave.
+    :type task_id: str
+    :param idx: Índice (base 0) de la página dentro del documento.
+    :type idx: int
+    :param data: La imagen codificada.
+    :type data: bytes
+    :param extension: Extensión del fichero ('jpg' o 'png').
+    :type extension: str
+    :param content_type: El tipo MIME de la imagen.
+    :type content_type: str
+    :return: La clave de S3 donde se ha guardado la imagen.
+    :rtype: str
+    """
+    image_key = f"{task_id}/pages/page_{idx:03d}.{extension}"
+    # Se deja también en la caché local: los lotes que caigan en este mismo host no la descargan.
+    cached_upload_bytes(image_key, data, content_type=content_type)
+    return image_key
+
+def _load_page_image(key: str) -> Image.Image:
+    """Descarga una imagen de página desde S3 y la decodifica en memoria como RGB.
+
+    La descarga pasa por la caché local del worker, que el orquestador ya rellena
+    al subir las páginas: en el mismo host, ni el lote ni sus reintentos vuelven
+    a pedir la imagen a S3. Las páginas rasterizadas ya
+    son RGB, así que solo se convierte cuando el modo difiere; `convert`
+    siempre devuelve una copia completa de la imagen.
+
+    :param key: Clave de S3 de la imagen de página.
+    :type key: str
+    :return: La imagen decodificada en modo RGB.
+    :rtype: Image.Image
+    """
+    image = Image.open(BytesIO(cached_download_bytes(key)))
+    if image.mode != "RGB":
+        return image.convert("RGB")
+    image.load()
+    return image
+
+def _store_page_result(task_id: str, result: Dict[str, Any]) -> Dict[str, Any]:
+    """Guarda en S3 el resultado de una página y devuelve una referencia ligera.
+
+    Así el backend de resultados de Celery (Redis) solo transporta la clave y no
+    todas las regiones con sus textos. Los resultados con error se devuelven tal
+    cual, ya que son pequeños.
+
+    :param task_id: El ID de la tarea global, usado como prefijo de la clave.
+    :type task_id: str
+    :param result: Los datos procesados de la página.
+    :type result: Dict[str, Any]
+    :return: Un diccionario con `page_number`, `result_key` y `error`.
+    :rtype: Dict[str, Any]
+    """
+    if result.get("error"):
+        return result
+    result_key = f"{task_id}/page_results/page_{result['page_number']:03d}.json"
+    upload_bytes(result_key, orjson.dumps(result), "application/json")
+    return {"page_number": result["page_number"], "result_key": result_key, "error": None}
+
+def _load_page_result(page_ref: Dict[str, Any]) -> Dict[str, Any]:
+    """Recupera desde S3 el resultado completo de una página a partir de su referencia.
+
+    :param page_ref: La referencia devuelta por `_store_page_result`.
+    :type page_ref: Dict[str, Any]
+    :return: Los datos completos de la página.
+    :rtype: Dict[str, Any]
+    """
+    if not page_ref.get("result_key"):
+        return page_ref
+    return orjson.loads(download_bytes(page_ref["result_key"]))
+
+def _extract_and_translate_pages(page_images: List[Image.Image], page_numbers: List[int], tgt_lang: str, language_model: str, confidence: float) -> List[Dict[str, Any]]:
+    """Detecta el layout, extrae el texto y lo traduce para un conjunto de páginas.
+
+    Las imágenes se cierran en cuanto termina la extracción, antes de lanzar las
+    traducciones, para no retener su memoria mientras se espera a la API.
+
+    :param page_images: Las imágenes de las páginas, en el mismo orden que `page_numbers`.
+    :type page_images: List[Image.Image]
+    :param page_numbers: Número (base 0) de cada página dentro del documento.
+    :type page_numbers: List[int]
+    :param tgt_lang: Código del idioma de destino.
+    :type tgt_lang: str
+    :param language_model: Identificador del modelo de IA.
+    :type language_model: str
+    :param confidence: Umbral de confianza para la detección de layout.
+    :type confidence: float
+    :return: Los datos de cada página con `page_number`, `error` y los textos traducidos.
+    :rtype: List[Dict[str, Any]]
+    """
+    try:
+        extracted_data = extract_page_data_in_batch(page_images, confidence, dpi=settings.RASTER_DPI)
+    finally:
+        # Los píxeles ya no hacen falta: se liberan antes de esperar a las traducciones.
+        for image in page_images:
+            image.close()
+    translated_data = _run_async(translate_extracted_text(extracted_data, tgt_lang, language_model, _translation_client))
+    for page_number, result in zip(page_numbers, translated_data):
+        result["page_number"] = page_number
+        result.setdefault("error", None)
+    return translated_data
+
+def _finalize_document(task_id: str, results_list: List[Dict[str, Any]], translated_pdf: BinaryIO, src_lang: str, tgt_lang: str) -> Dict[str, Any]:
+    """Sube a S3 el PDF traducido junto con los datos de traducción, posición y metadatos.
+
+    :param task_id: Identificador único de la tarea global.
+    :type task_id: str
+    :param results_list: Los datos de cada página, en orden.
+    :type results_list: List[Dict[str, Any]]
+    :param translated_pdf: El PDF traducido, rebobinado; se cierra tras la subida.
+    :type translated_pdf: BinaryIO
+    :param src_lang: Código del idioma de origen.
+    :type src_lang: str
+    :param tgt_lang: Código del idioma de destino.
+    :type tgt_lang: str
+    :return: Un diccionario con el estado final y las claves de S3 de los artefactos generados.
+    :rtype: Dict[str, Any]
+    """
+    translated_key = f"{task_id}/translated/translated.pdf"
+    
+    # Un único recorrido de las páginas alimenta ambos documentos y la lista de errores.
+    translation_pages, position_pages, errors = [], [], []
+    for i, page_data in enumerate(results_list):
+        if page_data.get("error"):
+            errors.append(page_data["error"])
+            continue
+        page_number = page_data.get('page_number', i)
+        translations, regions = [], []
+        for text_region in page_data.get("text_regions", []):
+            region_id = text_region["id"]
+            translations.append({
+                "id": region_id, "original_text": text_region["original_text"], "translated_text": text_region["translated_text"]
+            })
+            regions.append({"id": region_id, "position": text_region["position"]})
+        translation_pages.append({"page_number": page_number, "translations": translations})
+        position_pages.append({
+            "page_number": page_number, "dimensions": page_data.get("page_dimensions"),
+            "regions": regions, "image_regions": page_data.get("image_regions", [])
+        })
+    
+    translation_data = {"pages": translation_pages}
+    # Los idiomas viajan con las posiciones: la regeneración los necesita y ya descarga este documento.
+    position_data = {"meta": {"src_lang": src_lang, "tgt_lang": tgt_lang}, "pages": position_pages}
+    
+    translation_key = f"{task_id}/translated/translated_translation_data.json"
+    position_key = f"{task_id}/translated/translated_translation_data_position.json"
+    
+    # JSON compacto: la sangría casi duplicaba el tamaño y solo lo leen la API y el frontend.
+    json_options = orjson.OPT_NON_STR_KEYS
+    
+    meta_data = {
+        "pages": len(results_list), "errors": errors, "src_lang": src_lang, "tgt_lang": tgt_lang,
+        "completed_at": datetime.now(timezone.utc)
+    }
+    meta_key = f"{task_id}/translated/metadata.json"
+    
+    # Las cuatro subidas son independientes: se lanzan a la vez.
+    try:
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            uploads = [
+                executor.submit(upload_fileobj, translated_key, translated_pdf, "application/pdf"),
+                executor.submit(upload_bytes, translation_key, orjson.dumps(translation_data, option=json_options), "application/json"),
+                executor.submit(upload_bytes, position_key, orjson.dumps(position_data, option=json_options), "application/json"),
+                executor.submit(upload_bytes, meta_key, orjson.dumps(meta_data, option=json_options), "application/json"),
+            ]
+        for upload in uploads:
+            upload.result()
+    finally:
+        translated_pdf.close()
+    
+    logger.info(f"Task {task_id} completed successfully")
+    
+    return {
+        "status": "COMPLETED", "translated_key": translated_key,
+        "translation_data_key": translation_key, "position_data_key": position_key,
+        "meta_key": meta_key, "errors": errors,
+    }
 
 # =============================================================================
 # DEFINICIÓN DE TAREAS CELERY
 # =============================================================================
 
 @celery_app.task(name='process_pdf_document', bind=True)
-def process_pdf_document(self, file_content: bytes, src_lang: str, tgt_lang: str, language_model: str = "openai/gpt-4o-mini", confidence: float = 0.45):
+def process_pdf_document(self, original_key: str, src_lang: str, tgt_lang: str, language_model: str = "openai/gpt-4o-mini", confidence: float = 0.45, image_format: Optional[str] = None):
     """Tarea orquestadora principal que inicia el flujo de traducción de un PDF.
 
-    Sube el PDF original, lo convierte en imágenes por página, agrupa las páginas
+    Descarga el PDF original, lo convierte en imágenes por página, agrupa las páginas
     en lotes y lanza un `chord` de Celery para procesar los lotes en paralelo. La
     tarea finalizadora del `chord` (`assemble_final_pdf`) se encargará de unir los resultados.
+    Los documentos de hasta `INLINE_PAGE_LIMIT` páginas se procesan por completo en
+    esta misma tarea, sin `chord`.
 
     :param self: La instancia de la tarea de Celery (inyectada por `bind=True`).
-    :param file_content: El contenido del archivo PDF en bytes.
-    :type file_content: bytes
+    :param original_key: Clave S3 del PDF original, subido previamente por la API.
+    :type original_key: str
     :param src_lang: Código del idioma de origen.
     :type src_lang: str
     :param tgt_lang: Código del idioma de destino.
@@ -164,7 +732,11 @@ def process_pdf_document(self, file_content: bytes, src_lang: str, tgt_lang: str
     :type language_model: str
     :param confidence: Umbral de confianza para la detección de layout.
     :type confidence: float
-    :return: Un diccionario con el estado del proceso y el ID de la tarea finalizadora.
+    :param image_format: Formato de las imágenes de página que se suben para los lotes
+                         ('JPEG' o 'PNG'); por defecto `settings.PAGE_IMAGE_FORMAT`.
+    :type image_format: Optional[str]
+    :return: Un diccionario con el estado del proceso y el ID de la tarea finalizadora,
+             o el resultado final si el documento se ha procesado en línea.
     :rtype: dict
     """
     try:
@@ -172,21 +744,40 @@ def process_pdf_document(self, file_content: bytes, src_lang: str, tgt_lang: str
         logger.info(f"Iniciando orquestación por lotes para tarea {task_id}")
         
         self.update_state(state='PROGRESS', meta={'status': 'Preparando documento'})
-        original_key = f"{task_id}/original.pdf"
-        upload_bytes(original_key, file_content, content_type="application/pdf")
+        file_content = download_bytes(original_key)
         
         self.update_state(state='PROGRESS', meta={'status': 'Analizando páginas'})
-        images = convert_from_bytes(file_content, fmt="png", dpi=300)
-        if not images:
-            raise Exception("No se pudieron generar imágenes del PDF.")
+        with pymupdf.open(stream=file_content, filetype="pdf") as source_doc:
+            page_count = source_doc.page_count
+            if not page_count:
+                raise Exception("No se pudieron generar imágenes del PDF.")
+            
+            if page_count <= INLINE_PAGE_LIMIT:
+                images = [_pixmap_to_image(_render_page(page)) for page in source_doc]
+            else:
+                images = None
+                # PyMuPDF no es seguro entre hilos, así que el renderizado es secuencial en este
+                # hilo; la conversión, la codificación (PIL libera el GIL) y la subida de cada
+                # página van al pool. El semáforo limita los pixmaps pendientes en memoria.
+                in_flight = threading.BoundedSemaphore(MAX_TRANSFER_WORKERS * 2)
+                with ThreadPoolExecutor(max_workers=MAX_TRANSFER_WORKERS) as executor:
+                    uploads = []
+                    for idx, page in enumerate(source_doc):
+                        in_flight.acquire()
+                        upload = executor.submit(_encode_and_upload_page, task_id, idx, _render_page(page), image_format)
+                        upload.add_done_callback(lambda _: in_flight.release())
+                        uploads.append(upload)
+                    page_info = [(idx, upload.result()) for idx, upload in enumerate(uploads)]
         
-        page_info = []
-        for idx, img in enumerate(images):
-            buf = BytesIO()
-            img.save(buf, format="PNG")
-            png_key = f"{task_id}/pages/page_{idx:03d}.png"
-            upload_bytes(png_key, buf.getvalue(), content_type="image/png")
-            page_info.append((idx, png_key))
+        if images is not None:
+            # Un único lote: el chord solo añadiría mensajes y viajes a S3 y a Redis,
+            # así que el documento se procesa aquí con las imágenes ya en memoria.
+            logger.info(f"Procesando {len(images)} páginas en línea para tarea {task_id}")
+            self.update_state(state='PROGRESS', meta={'status': 'Traduciendo contenido'})
+            results_list = _extract_and_translate_pages(images, list(range(len(images))), tgt_lang, language_model, confidence)
+            self.update_state(state='PROGRESS', meta={'status': 'Finalizando documento'})
+            translated_pdf = build_translated_pdf(results_list, task_id, tgt_lang, file_content, output=_new_pdf_output())
+            return _finalize_document(task_id, results_list, translated_pdf, src_lang, tgt_lang)
         
         logger.info(f"Subidas {len(page_info)} imágenes. Creando lotes de tamaño {PAGE_PROCESSING_BATCH_SIZE}.")
         
@@ -217,11 +808,12 @@ def process_pdf_document(self, file_content: bytes, src_lang: str, tgt_lang: str
         self.update_state(state='FAILURE', meta={'exc_type': type(e).__name__, 'exc_message': str(e)})
         return {"status": "failed", "error": str(e)}
 
-async def translate_extracted_text(extracted_data: List[Dict[str, Any]], tgt_lang: str, language_model: str) -> List[Dict[str, Any]]:
+async def translate_extracted_text(extracted_data: List[Dict[str, Any]], tgt_lang: str, language_model: str, client: Optional[AsyncOpenAI] = None) -> List[Dict[str, Any]]:
     """Gestiona llamadas concurrentes a la API de traducción para un lote de páginas.
 
     Utiliza `asyncio.gather` para realizar todas las solicitudes de traducción
     de un lote de forma paralela, mejorando significativamente el rendimiento.
+    Todas las solicitudes comparten un mismo cliente HTTP y su pool de conexiones.
 
     :param extracted_data: Lista de datos de página, cada una con regiones de texto extraídas.
     :type extracted_data: List[Dict[str, Any]]
@@ -229,19 +821,27 @@ async def translate_extracted_text(extracted_data: List[Dict[str, Any]], tgt_lan
     :type tgt_lang: str
     :param language_model: Identificador del modelo de IA.
     :type language_model: str
+    :param client: Cliente de traducción ligado al bucle actual; si se omite se crea
+                   uno para esta ejecución y se cierra al terminar.
+    :type client: Optional[AsyncOpenAI]
     :return: La misma estructura de datos de entrada, pero con el campo `translated_text`
              añadido a cada región de texto.
     :rtype: List[Dict[str, Any]]
     """
+    if not extracted_data:
+        logger.info("No text to translate in this batch.")
+        return extracted_data
+
+    if client is None:
+        # Sin bucle persistente: un cliente por ejecución, ligado al bucle de `asyncio.run`.
+        async with create_client() as client:
+            return await translate_extracted_text(extracted_data, tgt_lang, language_model, client)
+
     translation_coroutines = []
     for page_data in extracted_data:
         original_texts = [region["original_text"] for region in page_data.get("text_regions", [])]
-        coroutine = translate_text_async(original_texts, tgt_lang, language_model)
+        coroutine = translate_text_async(original_texts, tgt_lang, language_model, client=client)
         translation_coroutines.append(coroutine)
-    
-    if not translation_coroutines:
-        logger.info("No text to translate in this batch.")
-        return extracted_data
 
     logger.info(f"Lanzando {len(translation_coroutines)} tareas de traducción en paralelo...")
     all_translated_results = await asyncio.gather(*translation_coroutines)
@@ -272,7 +872,8 @@ async def translate_extracted_text(extracted_data: List[Dict[str, Any]], tgt_lan
 def extract_and_translate_batch(self, task_id: str, page_batch_info: List[Tuple[int, str]], src_lang: str, tgt_lang: str, language_model: str, confidence: float):
     """Tarea de worker que procesa un lote de páginas.
 
-    Realiza la detección de layout, OCR y traducción para un conjunto de páginas.
+    Realiza la detección de layout, OCR y traducción para un conjunto de páginas y
+    dibuja esas páginas en un PDF parcial que el finalizador solo concatena.
     Está diseñada para ser ejecutada en paralelo por múltiples workers de Celery.
 
     :param self: Instancia de la tarea de Celery.
@@ -288,26 +889,28 @@ def extract_and_translate_batch(self, task_id: str, page_batch_info: List[Tuple[
     :type language_model: str
     :param confidence: Umbral de confianza para la detección de layout.
     :type confidence: float
-    :return: Una lista de diccionarios, cada uno conteniendo los datos procesados
-             de una página (regiones de texto, imágenes, etc.).
-    :rtype: List[Dict[str, Any]]
+    :return: Un diccionario con `page_refs`, las referencias por página (`page_number`,
+             `result_key`, `error`), y `partial_pdf_key`, la clave del PDF con las
+             páginas del lote ya dibujadas (o `None` si el lote falló). Los datos
+             completos de cada página quedan guardados en S3.
+    :rtype: Dict[str, Any]
     """
     try:
         page_numbers = [info[0] for info in page_batch_info]
         logger.info(f"Procesando lote de páginas {page_numbers} para tarea {task_id}")
         
-        page_images = [Image.open(BytesIO(download_bytes(key))).convert("RGB") for _, key in page_batch_info]
-        extracted_data = extract_page_data_in_batch(page_images, confidence)
-        translated_data = asyncio.run(translate_extracted_text(extracted_data, tgt_lang, language_model))
-
-        final_batch_results = []
-        for i, result in enumerate(translated_data):
-            result["page_number"] = page_batch_info[i][0]
-            result.setdefault("error", None)
-            final_batch_results.append(result)
+        with ThreadPoolExecutor(max_workers=min(MAX_TRANSFER_WORKERS, len(page_batch_info))) as executor:
+            # Descarga y decodificación concurrentes: PIL libera el GIL al decodificar.
+            page_images = list(executor.map(_load_page_image, [key for _, key in page_batch_info]))
+            final_batch_results = _extract_and_translate_pages(page_images, page_numbers, tgt_lang, language_model, confidence)
+            stored_refs = executor.map(lambda result: _store_page_result(task_id, result), final_batch_results)
+            # El lote dibuja sus propias páginas mientras se suben sus resultados:
+            # el finalizador solo tiene que concatenar los PDF parciales.
+            partial_pdf_key = _store_partial_pdf(task_id, page_numbers[0], final_batch_results, tgt_lang)
+            page_refs = list(stored_refs)
             
         logger.info(f"Batch pages {page_numbers} processed successfully (extraction + translation)")
-        return final_batch_results
+        return {"page_refs": page_refs, "partial_pdf_key": partial_pdf_key}
     
     except FlexibleChecksumError as e:
         logger.warning(f"Error de checksum en lote {page_numbers}. Reintentando... Error: {e}")
@@ -319,20 +922,20 @@ def extract_and_translate_batch(self, task_id: str, page_batch_info: List[Tuple[
             "page_number": page_num, "text_regions": [], "image_regions": [],
             "page_dimensions": None, "error": f"Batch processing failed: {str(e)}",
         } for page_num, _ in page_batch_info]
-        return error_results
+        return {"page_refs": error_results, "partial_pdf_key": None}
 
 @celery_app.task(name='assemble_final_pdf', bind=True)
-def assemble_final_pdf(self, results_from_batches: List[List[Dict[str, Any]]], task_id: str, original_key: str, src_lang: str, tgt_lang: str):
+def assemble_final_pdf(self, results_from_batches: List[Dict[str, Any]], task_id: str, original_key: str, src_lang: str, tgt_lang: str):
     """Tarea finalizadora que ensambla el PDF completo a partir de los resultados de los lotes.
 
     Esta tarea se ejecuta una vez que todas las tareas `extract_and_translate_batch`
-    de un `chord` han finalizado. Consolida los resultados, construye el PDF,
+    de un `chord` han finalizado. Concatena los PDF parciales de los lotes,
     genera y guarda los metadatos de traducción y posición.
 
     :param self: Instancia de la tarea de Celery.
-    :param results_from_batches: Una lista de listas, donde cada sublista es el resultado
-                                 de una tarea de procesamiento de lote.
-    :type results_from_batches: List[List[Dict[str, Any]]]
+    :param results_from_batches: Los resultados de cada tarea de lote, en orden: las
+                                 referencias por página y la clave de su PDF parcial.
+    :type results_from_batches: List[Dict[str, Any]]
     :param task_id: Identificador único de la tarea global.
     :type task_id: str
     :param original_key: Clave de S3 del PDF original.
@@ -345,54 +948,25 @@ def assemble_final_pdf(self, results_from_batches: List[List[Dict[str, Any]]], t
     :rtype: dict
     """
     try:
-        results_list = [item for sublist in results_from_batches for item in sublist]
-        logger.info(f"Finalizing task {task_id} with {len(results_list)} pages from {len(results_from_batches)} batches.")
-        results_list.sort(key=lambda r: r.get("page_number", 0))
-        
+        page_refs = [ref for batch in results_from_batches for ref in batch["page_refs"]]
+        logger.info(f"Finalizing task {task_id} with {len(page_refs)} pages from {len(results_from_batches)} batches.")
+        page_refs.sort(key=lambda r: r.get("page_number", 0))
+        # Los resultados del chord llegan en el orden de los lotes, que es el de las páginas.
+        partial_pdf_keys = [batch["partial_pdf_key"] for batch in results_from_batches if batch["partial_pdf_key"]]
         self.update_state(state='PROGRESS', meta={'status': 'Finalizando documento'})
         
-        translated_pdf_bytes = build_translated_pdf(results_list, task_id, tgt_lang)
-        translated_key = f"{task_id}/translated/translated.pdf"
-        upload_bytes(translated_key, translated_pdf_bytes, content_type="application/pdf")
-        
-        translation_data = {
-            "pages": [{
-                "page_number": page_data.get('page_number', i),
-                "translations": [{
-                    "id": text_region["id"], "original_text": text_region["original_text"], "translated_text": text_region["translated_text"]
-                } for text_region in page_data.get("text_regions", [])]
-            } for i, page_data in enumerate(results_list) if not page_data.get("error")]
-        }
-        
-        position_data = {
-            "pages": [{
-                "page_number": page_data.get('page_number', i), "dimensions": page_data.get("page_dimensions"),
-                "regions": [{"id": text_region["id"], "position": text_region["position"]} for text_region in page_data.get("text_regions", [])],
-                "image_regions": page_data.get("image_regions", [])
-            } for i, page_data in enumerate(results_list) if not page_data.get("error")]
-        }
-        
-        translation_key = f"{task_id}/translated/translated_translation_data.json"
-        position_key = f"{task_id}/translated/translated_translation_data_position.json"
-        
-        upload_bytes(translation_key, json.dumps(translation_data, ensure_ascii=False, indent=2).encode(), "application/json")
-        upload_bytes(position_key, json.dumps(position_data, ensure_ascii=False, indent=2).encode(), "application/json")
-        
-        errors = [r["error"] for r in results_list if r and r.get("error")]
-        meta_data = {
-            "pages": len(results_list), "errors": errors, "src_lang": src_lang, "tgt_lang": tgt_lang,
-            "completed_at": json.dumps({"$date": {"$numberLong": str(int(time.time() * 1000))}})
-        }
-        meta_key = f"{task_id}/translated/metadata.json"
-        upload_bytes(meta_key, json.dumps(meta_data, ensure_ascii=False, indent=2).encode(), "application/json")
-        
-        logger.info(f"Task {task_id} completed successfully")
-        
-        return {
-            "status": "COMPLETED", "translated_key": translated_key,
-            "translation_data_key": translation_key, "position_data_key": position_key,
-            "meta_key": meta_key, "errors": errors,
-        }
+        with ThreadPoolExecutor(max_workers=max(1, min(MAX_TRANSFER_WORKERS, len(page_refs)))) as executor, \
+                ThreadPoolExecutor(max_workers=PARTIAL_PDF_PREFETCH) as partial_executor:
+            pages = executor.map(_load_page_result, page_refs)
+            # La concatenación se solapa con la descarga de los resultados de página; de los
+            # parciales solo se adelantan unos pocos para no tenerlos todos en memoria a la vez.
+            if partial_pdf_keys:
+                partial_pdfs = _prefetch(partial_executor, download_bytes, partial_pdf_keys, PARTIAL_PDF_PREFETCH)
+                translated_pdf = _merge_partial_pdfs(partial_pdfs)
+            else:
+                translated_pdf = build_translated_pdf([], task_id, tgt_lang, output=_new_pdf_output())
+            results_list = list(pages)
+        return _finalize_document(task_id, results_list, translated_pdf, src_lang, tgt_lang)
         
     except Exception as e:
         logger.error(f"Error finalizing task {task_id}: {e}", exc_info=True)
@@ -400,12 +974,13 @@ def assemble_final_pdf(self, results_from_batches: List[List[Dict[str, Any]]], t
         return {"status": "failed", "error": str(e)}
 
 @celery_app.task(name='regenerate_pdf_from_storage')
-def regenerate_pdf_from_storage(task_id: str, translation_data: dict, position_data: dict):
+def regenerate_pdf_from_storage(task_id: str, translation_data: dict, position_data: dict, tgt_lang: Optional[str] = None):
     """Regenera un PDF a partir de datos de traducción y posición almacenados.
 
     Esta tarea se utiliza cuando un usuario edita las traducciones a través de la
     interfaz. Recibe los textos actualizados y la información de layout original
     para reconstruir el PDF sin necesidad de un reprocesamiento completo (OCR, etc.).
+    Si los datos son idénticos a los de la última regeneración, no se vuelve a generar.
 
     :param task_id: Identificador único de la tarea.
     :type task_id: str
@@ -413,25 +988,44 @@ def regenerate_pdf_from_storage(task_id: str, translation_data: dict, position_d
     :type translation_data: dict
     :param position_data: Diccionario con la información de layout (posiciones, dimensiones).
     :type position_data: dict
+    :param tgt_lang: Código del idioma de destino; si no se indica, se toma de `position_data["meta"]`.
+    :type tgt_lang: Optional[str]
     :return: Un diccionario indicando el éxito y la clave de S3 del nuevo PDF.
     :rtype: dict
     """
     try:
         logger.info(f"Regenerating PDF from storage for task {task_id}")
         
-        tgt_lang = position_data.get("meta", {}).get("tgt_lang", "es")
+        tgt_lang = tgt_lang or position_data.get("meta", {}).get("tgt_lang", "es")
+        translated_key = f"{task_id}/translated/translated.pdf"
+        
+        # El editor puede volver a guardar sin cambios: si las entradas coinciden con las
+        # de la última regeneración, el PDF que hay en S3 ya es el correcto.
+        regen_hash = hashlib.blake2b(
+            orjson.dumps((translation_data, position_data, tgt_lang), option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS),
+            digest_size=16
+        ).hexdigest()
+        # El hash viaja como metadato del propio PDF: contenido y hash se escriben juntos.
+        translated_metadata = get_object_metadata(translated_key)
+        if translated_metadata is not None and translated_metadata.get("regen-hash") == regen_hash:
+            logger.info(f"PDF for task {task_id} is up to date, skipping regeneration")
+            return {"success": True, "translated_key": translated_key}
+
+        # Índices por número de página e id de región: búsquedas O(1) en lugar de recorrer listas.
+        pos_by_num = {p["page_number"]: p for p in position_data.get("pages", [])}
 
         results_list = []
         for page in translation_data.get("pages", []):
             page_num = page["page_number"]
-            page_pos = next((p for p in position_data.get("pages", []) if p["page_number"] == page_num), None)
+            page_pos = pos_by_num.get(page_num)
             if not page_pos: continue
 
             dimensions = page_pos.get("dimensions", {"width": 595, "height": 842})
+            region_by_id = {r["id"]: r for r in page_pos.get("regions", [])}
             
             text_regions = []
             for trans in page.get("translations", []):
-                region_pos = next((r for r in page_pos.get("regions", []) if r["id"] == trans["id"]), None)
+                region_pos = region_by_id.get(trans["id"])
                 if region_pos:
                     text_regions.append({
                         "id": trans["id"], "original_text": trans["original_text"],
@@ -444,9 +1038,8 @@ def regenerate_pdf_from_storage(task_id: str, translation_data: dict, position_d
                 "error": None
             })
         
-        translated_pdf_bytes = build_translated_pdf(results_list, task_id, tgt_lang)
-        translated_key = f"{task_id}/translated/translated.pdf"
-        upload_bytes(translated_key, translated_pdf_bytes, content_type="application/pdf")
+        with build_translated_pdf(results_list, task_id, tgt_lang, output=_new_pdf_output()) as translated_pdf:
+            upload_fileobj(translated_key, translated_pdf, content_type="application/pdf", metadata={"regen-hash": regen_hash})
         
         logger.info(f"PDF regenerated successfully for task {task_id}")
         return {"success": True, "translated_key": translated_key}
@@ -0,0 +1,132 @@
+"""Pruebas de la caché local de objetos de S3 (revalidación por ETag y desalojo).
+
+Se ejecutan desde el directorio `worker` con el entorno completo del worker
+(`pip install -r requirements.txt`); el cliente de S3 se sustituye por uno en memoria.
+"""
+import hashlib
+import os
+
+import pytest
+
+for _name in ("AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY", "AWS_S3_BUCKET"):
+    os.environ.setdefault(_name, "test")
+os.environ.setdefault("AWS_S3_ENDPOINT_URL", "http://127.0.0.1:9")
+
+pytest.importorskip("boto3")
+pytest.importorskip("pydantic_settings")
+from botocore.exceptions import ClientError
+
+from src.infrastructure.storage import s3
+
+
+class _Body:
+    def __init__(self, data: bytes):
+        self._data = data
+
+    def read(self) -> bytes:
+        return self._data
+
+
+class _FakeS3Client:
+    """Cliente mínimo con la semántica de GET condicional de S3."""
+
+    def __init__(self):
+        self.objects = {}
+        self.get_calls = []
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        self.objects[Key] = Body
+        return {"ETag": f'"{hashlib.md5(Body).hexdigest()}"'}
+
+    def get_object(self, Bucket, Key, IfNoneMatch=None):
+        self.get_calls.append((Key, IfNoneMatch))
+        data = self.objects[Key]
+        etag = f'"{hashlib.md5(data).hexdigest()}"'
+        if IfNoneMatch == etag:
+            raise ClientError({"Error": {"Code": "304", "Message": "Not Modified"}}, "GetObject")
+        return {"Body": _Body(data), "ETag": etag}
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    fake = _FakeS3Client()
+    monkeypatch.setattr(s3, "_client", fake)
+    monkeypatch.setattr(s3.settings, "LOCAL_CACHE_DIR", str(tmp_path / "cache"))
+    return fake
+
+
+def test_cached_download_revalidates_with_etag(client):
+    client.objects["a"] = b"v1"
+
+    assert s3.cached_download_bytes("a") == b"v1"
+    assert s3.cached_download_bytes("a") == b"v1"
+
+    assert client.get_calls[0] == ("a", None)
+    assert client.get_calls[1] == ("a", f'"{hashlib.md5(b"v1").hexdigest()}"')
+
+
+def test_cached_download_refreshes_changed_object(client):
+    client.objects["a"] = b"v1"
+    s3.cached_download_bytes("a")
+
+    client.objects["a"] = b"v2"
+    assert s3.cached_download_bytes("a") == b"v2"
+    assert s3.cached_download_bytes("a") == b"v2"
+    assert client.get_calls[-1][1] == f'"{hashlib.md5(b"v2").hexdigest()}"'
+
+
+def test_cached_upload_primes_the_cache(client):
+    s3.cached_upload_bytes("a", b"data")
+
+    assert s3.cached_download_bytes("a") == b"data"
+    assert client.get_calls == [("a", f'"{hashlib.md5(b"data").hexdigest()}"')]
+
+
+def test_cache_recreates_a_removed_directory(client):
+    client.objects["a"] = b"v1"
+    s3.cached_download_bytes("a")
+    for entry in os.scandir(s3.settings.LOCAL_CACHE_DIR):
+        os.unlink(entry.path)
+    os.rmdir(s3.settings.LOCAL_CACHE_DIR)
+
+    s3.cached_upload_bytes("b", b"v2")
+    assert os.path.exists(s3._cache_path("b"))
+
+
+def test_evict_cache_removes_least_recently_used(client, monkeypatch):
+    monkeypatch.setattr(s3.settings, "LOCAL_CACHE_MIN_FREE_BYTES", 0)
+    for i, key in enumerate(["old", "read", "new"]):
+        client.objects[key] = bytes([i]) * 99
+        s3.cached_download_bytes(key)
+        os.utime(s3._cache_path(key), (i, i))
+    # Una revalidación (304) marca la entrada como usada recientemente
+    s3.cached_download_bytes("read")
+    # Tres entradas de 33 + 99 bytes: recortar al 90 % de 300 obliga a desalojar una
+    monkeypatch.setattr(s3.settings, "LOCAL_CACHE_MAX_BYTES", 300)
+
+    remaining = s3._evict_cache(s3.settings.LOCAL_CACHE_DIR, free=1 << 30)
+
+    assert not os.path.exists(s3._cache_path("old"))
+    assert os.path.exists(s3._cache_path("read"))
+    assert os.path.exists(s3._cache_path("new"))
+    assert remaining <= 300 * s3._CACHE_EVICT_TARGET
+
+
+def test_store_evicts_when_the_mount_runs_low_on_space(client, monkeypatch):
+    real_statvfs = os.statvfs
+
+    class _LowSpace:
+        def __init__(self, usage):
+            self.f_frsize = 1
+            self.f_blocks = usage.f_blocks * usage.f_frsize
+            self.f_bfree = usage.f_bfree * usage.f_frsize
+            self.f_bavail = 0
+
+    monkeypatch.setattr(s3.settings, "LOCAL_CACHE_MIN_FREE_BYTES", 1)
+    evicted = []
+    monkeypatch.setattr(s3, "_evict_cache", lambda cache_dir, free: evicted.append(free) or 0)
+    monkeypatch.setattr(os, "statvfs", lambda path: _LowSpace(real_statvfs(path)))
+
+    s3.cached_upload_bytes("a", b"data")
+
+    assert evicted == [0]
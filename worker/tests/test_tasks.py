@@ -0,0 +1,99 @@
+"""Pruebas de la concatenación de los PDF parciales del finalizador y de la regeneración.
+
+Se ejecutan desde el directorio `worker` con el entorno completo del worker
+(`pip install -r requirements.txt`), ya que importan `tasks`.
+"""
+import os
+from io import BytesIO
+
+import pytest
+
+for _name in ("AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY", "AWS_S3_BUCKET"):
+    os.environ.setdefault(_name, "test")
+os.environ.setdefault("AWS_S3_ENDPOINT_URL", "http://127.0.0.1:9")
+
+pytest.importorskip("celery")
+pymupdf = pytest.importorskip("pymupdf")
+from reportlab.pdfgen import canvas
+
+import tasks
+
+
+def _make_pdf(pages: int) -> bytes:
+    buffer = BytesIO()
+    pdf_canvas = canvas.Canvas(buffer)
+    for i in range(pages):
+        pdf_canvas.drawString(72, 72, f"page {i}")
+        pdf_canvas.showPage()
+    pdf_canvas.save()
+    return buffer.getvalue()
+
+
+def _page_count(output) -> int:
+    with pymupdf.open(stream=output.read(), filetype="pdf") as doc:
+        return doc.page_count
+
+
+def test_merge_partial_pdfs_into_spooled_output():
+    output = tasks._merge_partial_pdfs(iter([_make_pdf(2), _make_pdf(3)]), tasks._new_pdf_output())
+    with output:
+        assert _page_count(output) == 5
+
+
+def test_merge_partial_pdfs_after_spool_rollover(monkeypatch):
+    monkeypatch.setattr(tasks, "PDF_SPOOL_MAX_SIZE", 16)
+    output = tasks._new_pdf_output()
+    with tasks._merge_partial_pdfs([_make_pdf(1), _make_pdf(1)], output):
+        # Por encima de PDF_SPOOL_MAX_SIZE el spool pasa a disco
+        assert output.seek(0, os.SEEK_END) > tasks.PDF_SPOOL_MAX_SIZE
+        output.seek(0)
+        assert _page_count(output) == 2
+
+
+TRANSLATION_DATA = {"pages": [{"page_number": 1, "translations": [
+    {"id": "r1", "original_text": "Hello", "translated_text": "Hola"}]}]}
+POSITION_DATA = {"meta": {"tgt_lang": "es"}, "pages": [{"page_number": 1, "regions": [
+    {"id": "r1", "position": {"x": 10, "y": 10, "width": 100, "height": 20}}]}]}
+
+
+@pytest.fixture
+def regen_storage(monkeypatch):
+    """Sustituye S3 y el renderizado por un almacén en memoria de metadatos."""
+    stored = {}
+    builds = []
+
+    def build_translated_pdf(results_list, task_id, tgt_lang, output):
+        builds.append(results_list)
+        return BytesIO(b"%PDF")
+
+    def upload_fileobj(key, fileobj, content_type=None, metadata=None):
+        stored[key] = metadata
+
+    monkeypatch.setattr(tasks, "get_object_metadata", stored.get)
+    monkeypatch.setattr(tasks, "build_translated_pdf", build_translated_pdf)
+    monkeypatch.setattr(tasks, "upload_fileobj", upload_fileobj)
+    return stored, builds
+
+
+def test_regenerate_skips_unchanged_input(regen_storage):
+    stored, builds = regen_storage
+
+    first = tasks.regenerate_pdf_from_storage("t1", TRANSLATION_DATA, POSITION_DATA)
+    second = tasks.regenerate_pdf_from_storage("t1", TRANSLATION_DATA, POSITION_DATA)
+
+    assert first == second == {"success": True, "translated_key": "t1/translated/translated.pdf"}
+    assert len(builds) == 1
+    assert "regen-hash" in stored["t1/translated/translated.pdf"]
+
+
+def test_regenerate_rebuilds_changed_input(regen_storage):
+    stored, builds = regen_storage
+    edited = {"pages": [{"page_number": 1, "translations": [
+        {"id": "r1", "original_text": "Hello", "translated_text": "Buenas"}]}]}
+
+    tasks.regenerate_pdf_from_storage("t1", TRANSLATION_DATA, POSITION_DATA)
+    tasks.regenerate_pdf_from_storage("t1", edited, POSITION_DATA)
+    tasks.regenerate_pdf_from_storage("t1", edited, POSITION_DATA, tgt_lang="fr")
+
+    assert len(builds) == 3
+    assert builds[1][0]["text_regions"][0]["translated_text"] == "Buenas"
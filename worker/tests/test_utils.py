@@ -0,0 +1,43 @@
+"""Pruebas del ajuste del tamaño de fuente de las regiones de texto.
+
+Solo necesitan ReportLab; se ejecutan desde el directorio `worker`.
+"""
+import pytest
+
+from src.domain.translator.utils import (
+    FIT_MEMO_MAX_TEXT_LENGTH,
+    _fit_paragraph_font_size,
+    _fit_paragraph_font_size_cached,
+    fit_paragraph_font_size,
+    fit_single_line_font_size,
+)
+
+TEXTS = ["Título", "Figura 3. Resultados del experimento", "Página 12 de 40", "a  b   c"]
+BOXES = [(40.0, 12.0), (120.5, 14.2), (300.0, 30.0), (600.0, 90.0)]
+
+
+@pytest.mark.parametrize("font_name", ["OpenSans", "STSong-Light"])
+@pytest.mark.parametrize("text", TEXTS)
+@pytest.mark.parametrize("width,height", BOXES)
+def test_single_line_fit_matches_paragraph_fit(text, width, height, font_name):
+    initial_font_size = int(max(8, height * 0.8))
+    font_size = fit_single_line_font_size(text, width, height, font_name, initial_font_size)
+    if font_size is None:
+        pytest.skip("el texto no cabe en una línea; se ajusta con Paragraph")
+    assert font_size == _fit_paragraph_font_size(text, width, height, font_name, initial_font_size, 6, 72)
+
+
+def test_single_line_fit_defers_markup_to_paragraph():
+    assert fit_single_line_font_size("a <b>b</b>", 300, 30, "OpenSans", 12) is None
+    assert fit_single_line_font_size("a &amp; b", 300, 30, "OpenSans", 12) is None
+
+
+def test_single_line_fit_defers_wrapped_text_to_paragraph():
+    assert fit_single_line_font_size("una frase demasiado larga para la caja", 40, 60, "OpenSans", 12) is None
+
+
+def test_paragraph_fit_memoizes_only_short_texts():
+    _fit_paragraph_font_size_cached.cache_clear()
+    fit_paragraph_font_size("cabecera", 200, 20, "OpenSans", 12)
+    fit_paragraph_font_size("x " * FIT_MEMO_MAX_TEXT_LENGTH, 200, 400, "OpenSans", 12)
+    assert _fit_paragraph_font_size_cached.cache_info().currsize == 1